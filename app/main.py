@@ -3,27 +3,118 @@ Streamlit web application for the Click & Collect Queue Simulation System.
 """
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 import sys
 import os
-import hashlib
+import importlib
+import threading
+from collections import OrderedDict
+
+# Add the project root to the path once (this script re-runs on every interaction)
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
 
-# Add the src directory to the path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# The app runs the parallel kernels from Streamlit script threads, and TBB can
+# hang at interpreter exit after that; prefer OpenMP in this process unless the
+# user chose a layer. Must be set before Numba is first imported.
+if "NUMBA_THREADING_LAYER" not in os.environ:
+    os.environ.setdefault("NUMBA_THREADING_LAYER_PRIORITY", "omp tbb workqueue")
 
 from src.models import ScenarioConfig
 from src.simulation.monte_carlo import MonteCarloRunner
-
-# Force reload of scenarios module to pick up changes
-import importlib
-if 'examples.scenarios' in sys.modules:
-    importlib.reload(sys.modules['examples.scenarios'])
-from examples.scenarios import ALL_SCENARIOS
+from src.simulation.queue_simulator import QueueSimulator
+from src.simulation._kernels import AVG_WAIT, warm_up
 
 # Password configuration - Change this for production deployment
 APP_PASSWORD = os.getenv("STREAMLIT_PASSWORD", "ClickCollect2025")  # Use env var or default
 
+# Number of simulated configurations whose results are kept for reuse
+RESULTS_CACHE_SIZE = 32
+
+
+@st.cache_resource
+def _load_scenarios():
+    """Load the predefined scenarios once per server process.
+    
+    Returns:
+        Tuple of (list of scenarios, dict mapping scenario name -> scenario)
+    """
+    from examples.scenarios import ALL_SCENARIOS
+    return ALL_SCENARIOS, {s.name: s for s in ALL_SCENARIOS}
+
+
+# Development aid: set DEV_RELOAD=1 to pick up edits to examples/scenarios.py
+if os.environ.get("DEV_RELOAD") and 'examples.scenarios' in sys.modules:
+    importlib.reload(sys.modules['examples.scenarios'])
+    _load_scenarios.clear()
+
+
+@st.cache_resource
+def get_runner():
+    """Return a Monte Carlo runner shared across reruns and sessions."""
+    # Load the compiled kernels now rather than on the first Run Simulation click
+    warm_up()
+    return MonteCarloRunner()
+
+
+def scenario_cache_key(scenario):
+    """Build a hashable key that uniquely identifies a scenario configuration."""
+    return (
+        scenario.name,
+        tuple(sorted(scenario.arrival_rates.items())),
+        scenario.num_desks,
+        tuple(sorted((scenario.desk_schedule or {}).items())),
+        scenario.mean_service_time,
+        tuple(scenario.operating_hours),
+        scenario.num_simulations,
+        scenario.qmc
+    )
+
+
+class _ResultsCache:
+    """Least-recently-used cache of Monte Carlo results by scenario key.
+    
+    Used rather than st.cache_data because the runs report progress to a
+    progress bar, and cache_data cannot replay element calls on blocks
+    created outside the cached function.
+    """
+    
+    def __init__(self, max_entries: int):
+        """Initialize an empty cache.
+        
+        Args:
+            max_entries: Number of results kept before the least recently used is dropped
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Return the results stored under key, or None, marking them as recently used."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+    
+    def put(self, key, results):
+        """Store results under key, evicting the least recently used past max_entries."""
+        with self._lock:
+            self._entries[key] = results
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+@st.cache_resource
+def _results_cache():
+    """Return the results cache shared across reruns and sessions."""
+    return _ResultsCache(RESULTS_CACHE_SIZE)
+
 
 def check_password():
     """Returns True if the user entered the correct password."""
@@ -120,6 +211,9 @@ def main():
     Predict waiting times and analyze different staffing scenarios.
     """)
     
+    _, scenarios_by_name = _load_scenarios()
+    get_runner()  # Warm the kernels while the user configures a scenario
+    
     # Sidebar for scenario selection and parameters
     st.sidebar.header("Simulation Parameters")
     
@@ -130,9 +224,9 @@ def main():
     )
     
     if scenario_type == "Predefined Scenarios":
-        scenario = create_predefined_scenario_ui()
+        scenario = create_predefined_scenario_ui(scenarios_by_name)
     else:
-        scenario = create_custom_scenario_ui()
+        scenario = create_custom_scenario_ui(scenarios_by_name)
     
     if scenario is None:
         st.warning("Please configure a scenario to run the simulation.")
@@ -151,22 +245,20 @@ def main():
     # Update scenario with selected number of simulations
     scenario.num_simulations = num_simulations
     
-    # Run simulation button
+    # Run simulation button; otherwise re-show the last results for this scenario
+    scenario_key = scenario_cache_key(scenario)
     if st.sidebar.button("🚀 Run Simulation", type="primary"):
         run_simulation(scenario)
+    elif "simulation_results" in st.session_state:
+        results_key, results = st.session_state["simulation_results"]
+        if results_key == scenario_key:
+            display_results(results)
 
 
-def create_predefined_scenario_ui():
+def create_predefined_scenario_ui(scenarios_by_name):
     """Create UI for selecting predefined scenarios."""
-    scenario_names = [s.name for s in ALL_SCENARIOS]
-    selected_name = st.sidebar.selectbox("Select Scenario", scenario_names)
-    
-    # Find the selected scenario
-    selected_scenario = None
-    for scenario in ALL_SCENARIOS:
-        if scenario.name == selected_name:
-            selected_scenario = scenario
-            break
+    selected_name = st.sidebar.selectbox("Select Scenario", list(scenarios_by_name))
+    selected_scenario = scenarios_by_name.get(selected_name)
     
     if selected_scenario:
         # Display scenario details
@@ -186,6 +278,7 @@ def create_predefined_scenario_ui():
         
         # Show arrival pattern
         display_arrival_pattern(selected_scenario)
+        display_erlang_c_preview(selected_scenario)
         
         # Show desk schedule if variable
         if selected_scenario.desk_schedule:
@@ -194,7 +287,7 @@ def create_predefined_scenario_ui():
     return selected_scenario
 
 
-def create_custom_scenario_ui():
+def create_custom_scenario_ui(scenarios_by_name):
     """Create UI for building custom scenarios."""
     st.subheader("Custom Scenario Configuration")
     
@@ -203,11 +296,11 @@ def create_custom_scenario_ui():
     
     template_scenario = None
     if use_template:
-        template_names = ["None"] + [s.name for s in ALL_SCENARIOS]
+        template_names = ["None"] + list(scenarios_by_name)
         selected_template = st.sidebar.selectbox("Select Template", template_names)
         
         if selected_template != "None":
-            template_scenario = next((s for s in ALL_SCENARIOS if s.name == selected_template), None)
+            template_scenario = scenarios_by_name.get(selected_template)
             if template_scenario:
                 st.sidebar.success(f"✅ Template loaded: {selected_template}")
                 st.sidebar.write("💡 All fields below are pre-filled. Modify as needed.")
@@ -248,24 +341,8 @@ def create_custom_scenario_ui():
     
     if staffing_type == "Constant":
         num_desks = st.sidebar.slider("Number of Desks", min_value=1, max_value=10, value=default_num_desks)
-        desk_schedule = None
     else:
-        st.sidebar.write("Configure desk schedule by hour:")
-        desk_schedule = {}
-        for hour in range(start_hour, end_hour):
-            # Default desk count from template or use 3
-            default_desk_count = 3
-            if template_scenario and template_scenario.desk_schedule and hour in template_scenario.desk_schedule:
-                default_desk_count = template_scenario.desk_schedule[hour]
-            
-            desks = st.sidebar.slider(
-                f"{hour}:00-{hour+1}:00", 
-                min_value=1, 
-                max_value=10, 
-                value=default_desk_count,
-                key=f"desk_{hour}"
-            )
-            desk_schedule[hour] = desks
+        st.sidebar.write("Configure the desk schedule in the hourly table.")
         num_desks = None
     
     # Arrival rates configuration
@@ -281,41 +358,66 @@ def create_custom_scenario_ui():
     else:
         st.write("Configure expected customer arrivals per hour:")
     
-    arrival_rates = {}
-    cols = st.columns(min(4, end_hour - start_hour))
+    # One editable grid for all hourly inputs (arrivals, and desks if variable)
+    hours = list(range(start_hour, end_hour))
+    template_rates = template_scenario.arrival_rates if template_scenario else {}
+    template_desks = (template_scenario.desk_schedule or {}) if template_scenario else {}
     
-    for i, hour in enumerate(range(start_hour, end_hour)):
-        col_idx = i % len(cols)
-        with cols[col_idx]:
-            # Default arrival rate from template or use 10
-            default_rate = 10.0
-            if template_scenario and hour in template_scenario.arrival_rates:
-                default_rate = float(template_scenario.arrival_rates[hour])
-            
-            rate = st.number_input(
-                f"{hour}:00-{hour+1}:00",
-                min_value=0.0,
-                max_value=200.0,
-                value=default_rate,
-                step=1.0,
-                key=f"arrival_{hour}"
-            )
-            arrival_rates[hour] = rate
+    hourly_data = {
+        "hour": hours,
+        "arrivals": [float(template_rates.get(hour, 10.0)) for hour in hours]
+    }
+    column_config = {
+        "hour": st.column_config.NumberColumn("Hour", disabled=True, format="%d:00"),
+        "arrivals": st.column_config.NumberColumn(
+            "Customers per Hour", min_value=0.0, max_value=200.0, step=1.0
+        )
+    }
+    if staffing_type == "Variable":
+        hourly_data["desks"] = [int(template_desks.get(hour, 3)) for hour in hours]
+        column_config["desks"] = st.column_config.NumberColumn(
+            "Desks", min_value=1, max_value=10, step=1
+        )
+    
+    edited = st.data_editor(
+        pd.DataFrame(hourly_data),
+        num_rows="fixed",
+        hide_index=True,
+        column_config=column_config,
+        width="stretch"
+    )
     
-    # Create scenario
+    arrival_rates = dict(zip(edited["hour"].tolist(), edited["arrivals"].fillna(0.0).astype(float).tolist()))
+    if staffing_type == "Variable":
+        desk_schedule = dict(zip(edited["hour"].tolist(), edited["desks"].fillna(1).astype(int).tolist()))
+    else:
+        desk_schedule = None
+    
+    # Create scenario, reusing the validated config while the inputs are unchanged
+    config_key = (
+        scenario_name, start_hour, end_hour, mean_service_time, num_desks,
+        tuple(sorted((desk_schedule or {}).items())),
+        tuple(sorted(arrival_rates.items()))
+    )
     try:
-        scenario = ScenarioConfig(
-            name=scenario_name,
-            arrival_rates=arrival_rates,
-            num_desks=num_desks,
-            desk_schedule=desk_schedule,
-            mean_service_time=mean_service_time,
-            operating_hours=(start_hour, end_hour),
-            num_simulations=500  # Default, will be updated
-        )
+        cached = st.session_state.get("_scenario_cache")
+        if cached is not None and cached[0] == config_key:
+            scenario = cached[1]
+        else:
+            scenario = ScenarioConfig(
+                name=scenario_name,
+                arrival_rates=arrival_rates,
+                num_desks=num_desks,
+                desk_schedule=desk_schedule,
+                mean_service_time=mean_service_time,
+                operating_hours=(start_hour, end_hour),
+                num_simulations=500  # Default, will be updated
+            )
+            st.session_state["_scenario_cache"] = (config_key, scenario)
         
         # Display the configured scenario
         display_arrival_pattern(scenario)
+        display_erlang_c_preview(scenario)
         if scenario.desk_schedule:
             display_desk_schedule(scenario)
         
@@ -326,65 +428,55 @@ def create_custom_scenario_ui():
         return None
 
 
+def display_erlang_c_preview(scenario):
+    """Show an instant analytical wait estimate before running the simulation."""
+    metrics = QueueSimulator.simulate_analytic(scenario)
+    if metrics is None:
+        st.caption("Analytical estimate (Erlang-C): demand exceeds capacity in at least "
+                   "one hour, so the queue will build up")
+        return
+    
+    st.caption(f"Analytical estimate (Erlang-C, steady state per hour): "
+               f"avg wait ≈ {metrics[AVG_WAIT]:.1f} min. Run the simulation for the full picture.")
+
+
 def display_arrival_pattern(scenario):
     """Display the arrival pattern chart."""
     st.write("### Customer Arrival Pattern")
     
-    hours = list(scenario.arrival_rates.keys())
-    rates = list(scenario.arrival_rates.values())
-    
-    fig = px.bar(
-        x=hours, 
-        y=rates,
-        labels={'x': 'Hour of Day', 'y': 'Customers per Hour'},
-        title="Expected Customer Arrivals by Hour"
-    )
-    fig.update_layout(showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
+    rates = pd.Series(scenario.arrival_rates, name="Customers per Hour").rename_axis("Hour of Day")
+    st.bar_chart(rates, width="stretch")
 
 
 def display_desk_schedule(scenario):
     """Display the desk staffing schedule."""
     st.write("### Desk Staffing Schedule")
     
-    hours = list(scenario.desk_schedule.keys())
-    desks = list(scenario.desk_schedule.values())
-    
-    fig = px.line(
-        x=hours, 
-        y=desks,
-        labels={'x': 'Hour of Day', 'y': 'Number of Desks'},
-        title="Desk Staffing by Hour",
-        markers=True
-    )
-    fig.update_layout(showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
+    desks = pd.Series(scenario.desk_schedule, name="Number of Desks").rename_axis("Hour of Day")
+    st.line_chart(desks, width="stretch")
 
 
 def run_simulation(scenario):
     """Run the Monte Carlo simulation and display results."""
-    st.header("🔄 Running Simulation...")
-    
-    # Create progress bar
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
     try:
-        # Initialize runner
-        runner = MonteCarloRunner()
-        
-        # Update progress
-        progress_bar.progress(0.2)
-        status_text.text("Initializing simulation...")
-        
-        # Run simulation
-        progress_bar.progress(0.5)
-        status_text.text("Running Monte Carlo simulation...")
-        
-        results = runner.run_simulation(scenario)
+        scenario_key = scenario_cache_key(scenario)
         
-        progress_bar.progress(1.0)
-        status_text.text("Simulation complete!")
+        with st.status("🔄 Running Monte Carlo simulation...", expanded=True) as status:
+            progress_bar = st.progress(0.0)
+            
+            def update_progress(done, total):
+                progress_bar.progress(done / total, text=f"{done} / {total} simulations")
+            
+            # Reuse the results of an unchanged configuration
+            results_cache = _results_cache()
+            results = results_cache.get(scenario_key)
+            if results is None:
+                results = get_runner().run_simulation(scenario, progress_callback=update_progress)
+                results_cache.put(scenario_key, results)
+            st.session_state["simulation_results"] = (scenario_key, results)
+            
+            progress_bar.progress(1.0)
+            status.update(label="Simulation complete!", state="complete", expanded=False)
         
         # Display results
         display_results(results)
@@ -418,7 +510,8 @@ def display_results(results):
     with col3:
         st.metric(
             "Maximum Wait Time",
-            f"{results.max_wait_time:.2f} min",
+            # Not given by the analytical estimate
+            "n/a" if np.isnan(results.max_wait_time) else f"{results.max_wait_time:.2f} min",
             help="Longest wait time experienced by any customer"
         )
     
@@ -439,43 +532,35 @@ def display_results(results):
     # Detailed results with confidence intervals
     st.subheader("Detailed Results (95% Confidence Intervals)")
     
-    metrics_data = {
-        "Metric": [
-            "Average Wait Time (min)",
-            "95th Percentile Wait Time (min)",
-            "Maximum Wait Time (min)",
-            "Average Queue Length",
-            "Desk Utilization (%)",
-            "Service Level ≤5min (%)"
-        ],
-        "Value": [
-            f"{results.avg_wait_time:.2f}",
-            f"{results.p95_wait_time:.2f}",
-            f"{results.max_wait_time:.2f}",
-            f"{results.avg_queue_length:.2f}",
-            f"{results.desk_utilization:.1%}",
-            f"{results.service_level_5min:.1%}"
-        ],
-        "95% CI Lower": [
-            f"{results.avg_wait_time_ci[0]:.2f}",
-            f"{results.p95_wait_time_ci[0]:.2f}",
-            f"{results.max_wait_time_ci[0]:.2f}",
-            f"{results.avg_queue_length_ci[0]:.2f}",
-            f"{results.desk_utilization_ci[0]:.1%}",
-            f"{results.service_level_5min_ci[0]:.1%}"
-        ],
-        "95% CI Upper": [
-            f"{results.avg_wait_time_ci[1]:.2f}",
-            f"{results.p95_wait_time_ci[1]:.2f}",
-            f"{results.max_wait_time_ci[1]:.2f}",
-            f"{results.avg_queue_length_ci[1]:.2f}",
-            f"{results.desk_utilization_ci[1]:.1%}",
-            f"{results.service_level_5min_ci[1]:.1%}"
-        ]
-    }
-    
-    df = pd.DataFrame(metrics_data)
-    st.dataframe(df, use_container_width=True)
+    metric_names = [
+        "Average Wait Time (min)",
+        "95th Percentile Wait Time (min)",
+        "Maximum Wait Time (min)",
+        "Average Queue Length",
+        "Desk Utilization (%)",
+        "Service Level ≤5min (%)"
+    ]
+    values = np.array([
+        [results.avg_wait_time, *results.avg_wait_time_ci],
+        [results.p95_wait_time, *results.p95_wait_time_ci],
+        [results.max_wait_time, *results.max_wait_time_ci],
+        [results.avg_queue_length, *results.avg_queue_length_ci],
+        [results.desk_utilization, *results.desk_utilization_ci],
+        [results.service_level_5min, *results.service_level_5min_ci]
+    ], dtype=np.float64)
+    
+    df = pd.DataFrame(
+        values,
+        index=pd.Index(metric_names, name="Metric"),
+        columns=["Value", "95% CI Lower", "95% CI Upper"]
+    )
+    # Keep values numeric and format per row only at render time
+    styled = (
+        df.style
+        .format("{:.2f}", subset=pd.IndexSlice[metric_names[:4], :], na_rep="n/a")
+        .format("{:.1%}", subset=pd.IndexSlice[metric_names[4:], :], na_rep="n/a")
+    )
+    st.dataframe(styled, width="stretch")
     
     # Additional statistics
     st.subheader("Additional Statistics")
@@ -487,7 +572,7 @@ def display_results(results):
     
     # Text report
     with st.expander("📄 Detailed Report"):
-        runner = MonteCarloRunner()
+        runner = get_runner()
         report = runner.generate_report(results)
         st.text(report)
 
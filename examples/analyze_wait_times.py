@@ -3,14 +3,16 @@
 Diagnostic script to analyze maximum waiting times in detail.
 """
 import sys
-import os
+from pathlib import Path
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the src directory to the path so we can import our modules
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from src.simulation.queue_simulator import QueueSimulator
 from src.simulation.arrival_generator import ArrivalGenerator
+from src.simulation._kernels import fifo_schedule, simulate_day
 from examples.scenarios import WEEKDAY_BASIC_SMALL, PEAKSEASON_DAY_VARIABLE
 
 
@@ -23,35 +25,37 @@ def analyze_wait_times(scenario, num_runs=5):
     print()
     
     simulator = QueueSimulator(random_seed=42)
+    generator = simulator.arrival_generator
+    
+    # Draw every run's arrivals, then all their service times in one batch
+    all_arrivals = [generator.generate_arrivals(scenario) for _ in range(num_runs)]
+    offsets = np.concatenate(([0], np.cumsum([len(a) for a in all_arrivals])))
+    service_pool = generator.generate_service_times(int(offsets[-1]), scenario.mean_service_time)
+    desks_per_hour = scenario.get_hourly_desk_counts()
+    total_minutes = float((scenario.operating_hours[1] - scenario.operating_hours[0]) * 60)
+    
+    def simulate_run(run):
+        """Simulate one drawn day; the kernel releases the GIL while it runs."""
+        arrival_times = all_arrivals[run]
+        service_times = service_pool[offsets[run]:offsets[run + 1]]
+        return QueueSimulator.results_from_metrics(
+            scenario, simulate_day(arrival_times, service_times, desks_per_hour, total_minutes)
+        )
+    
+    # The runs are independent, so simulate them on threads
+    with ThreadPoolExecutor(max_workers=num_runs) as executor:
+        results = list(executor.map(simulate_run, range(num_runs)))
     
-    for run in range(num_runs):
+    for run, result in enumerate(results):
         print(f"--- Run {run + 1} ---")
         
-        # Generate arrivals and service times
-        arrival_times = simulator.arrival_generator.generate_arrivals(scenario)
-        service_times = simulator.arrival_generator.generate_service_times(
-            len(arrival_times), scenario.mean_service_time
-        )
-        
+        arrival_times = all_arrivals[run]
         print(f"Total arrivals: {len(arrival_times)}")
-        if arrival_times:
+        if len(arrival_times):
             print(f"First arrival: {arrival_times[0]:.2f} min ({arrival_times[0]/60:.2f} hours)")
             print(f"Last arrival: {arrival_times[-1]:.2f} min ({arrival_times[-1]/60:.2f} hours)")
             print(f"Peak arrival period: {np.percentile(arrival_times, 75):.2f} - {np.percentile(arrival_times, 95):.2f} min")
         
-        # Run simulation with detailed tracking
-        customers = [
-            simulator._create_customer(i, arrival_time) 
-            for i, arrival_time in enumerate(arrival_times)
-        ]
-        
-        # Simulate (this is a simplified version to see what happens)
-        result = simulator.simulate(scenario)
-        
-        # Find customers with highest wait times
-        completed_customers = []
-        # We need to access the customers after simulation - let me modify this
-        
         print(f"Average wait time: {result.avg_wait_time:.2f} minutes")
         print(f"Maximum wait time: {result.max_wait_time:.2f} minutes")
         print(f"Service level (≤5min): {result.service_level_5min:.1%}")
@@ -73,22 +77,22 @@ def detailed_single_run_analysis(scenario):
     
     print(f"Generated {len(arrival_times)} customers")
     
-    if not arrival_times:
+    if not len(arrival_times):
         print("No customers generated!")
         return
     
-    # Show arrival pattern
+    # Show arrival pattern; arrivals are sorted, so hour boundaries bucket them
     print("\nArrival pattern by hour:")
     operating_start = scenario.operating_hours[0]
-    for hour_offset in range(scenario.operating_hours[1] - scenario.operating_hours[0]):
-        hour_start = hour_offset * 60
-        hour_end = (hour_offset + 1) * 60
-        hour_arrivals = [t for t in arrival_times if hour_start <= t < hour_end]
+    num_hours = scenario.operating_hours[1] - scenario.operating_hours[0]
+    hour_counts = np.diff(np.searchsorted(arrival_times, np.arange(num_hours + 1) * 60))
+    expected_rates = np.array([scenario.arrival_rates.get(operating_start + h, 0.0)
+                               for h in range(num_hours)])
+    for hour_offset in range(num_hours):
         actual_hour = operating_start + hour_offset
-        expected_rate = scenario.arrival_rates.get(actual_hour, 0)
-        print(f"  {actual_hour:2d}:00-{actual_hour+1:2d}:00: {len(hour_arrivals):3d} customers (expected: {expected_rate})")
+        print(f"  {actual_hour:2d}:00-{actual_hour+1:2d}:00: {hour_counts[hour_offset]:3d} customers (expected: {expected_rates[hour_offset]})")
     
-    print(f"\nService time stats: mean={np.mean(service_times):.2f}, max={np.max(service_times):.2f} min")
+    print(f"\nService time stats: mean={service_times.mean():.2f}, max={service_times.max():.2f} min")
     
     # Simple simulation to show the queue buildup
     print("\nSimulating customer flow...")
@@ -100,40 +104,19 @@ def detailed_single_run_analysis(scenario):
     
     print(f"Using {num_desks} desks")
     
-    desk_available_times = [0.0] * num_desks
-    max_wait_encountered = 0.0
-    max_wait_customer = None
-    queue_lengths = []
-    
     # Process first 50 customers to show the pattern
     customers_to_show = min(50, len(arrival_times))
+    wait_times, _, busy_desks = fifo_schedule(
+        arrival_times[:customers_to_show], service_times[:customers_to_show], np.zeros(num_desks)
+    )
+    queue_lengths = np.maximum(0, busy_desks - num_desks)
+    max_wait_encountered = wait_times.max()
+    max_wait_customer = int(np.argmax(wait_times)) if max_wait_encountered > 0 else None
     
+    # Show customers with significant waits or first few
     for i in range(customers_to_show):
-        arrival_time = arrival_times[i]
-        service_time = service_times[i]
-        
-        # Find earliest available desk
-        earliest_desk = min(range(num_desks), key=lambda d: desk_available_times[d])
-        earliest_available_time = desk_available_times[earliest_desk]
-        
-        # When can this customer start service?
-        service_start_time = max(arrival_time, earliest_available_time)
-        wait_time = service_start_time - arrival_time
-        
-        # Update desk availability
-        desk_available_times[earliest_desk] = service_start_time + service_time
-        
-        # Count how many desks are busy at arrival time
-        busy_desks = sum(1 for t in desk_available_times if t > arrival_time)
-        queue_lengths.append(max(0, busy_desks - num_desks))
-        
-        if wait_time > max_wait_encountered:
-            max_wait_encountered = wait_time
-            max_wait_customer = i
-        
-        # Show customers with significant waits or first few
-        if i < 10 or wait_time > 5.0:
-            print(f"  Customer {i:2d}: arrival={arrival_time:6.2f}, wait={wait_time:6.2f} min, service={service_time:5.2f} min, busy_desks={busy_desks}")
+        if i < 10 or wait_times[i] > 5.0:
+            print(f"  Customer {i:2d}: arrival={arrival_times[i]:6.2f}, wait={wait_times[i]:6.2f} min, service={service_times[i]:5.2f} min, busy_desks={busy_desks[i]}")
     
     print(f"\nIn first {customers_to_show} customers:")
     print(f"  Maximum wait time: {max_wait_encountered:.2f} minutes (customer {max_wait_customer})")
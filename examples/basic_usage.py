@@ -2,10 +2,10 @@
 Basic usage example for the Click & Collect Queue Simulation System.
 """
 import sys
-import os
+from pathlib import Path
 
 # Add the src directory to the path so we can import our modules
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from src.simulation.monte_carlo import MonteCarloRunner
 from examples.scenarios import WEEKDAY_BASIC_LARGE, PEAKSEASON_DAY_VARIABLE
@@ -48,6 +48,8 @@ def main():
         print(f"Error running simulation: {e}")
         print("Make sure you have installed the required dependencies:")
         print("pip install -r requirements.txt")
+    finally:
+        runner.close()
 
 
 if __name__ == "__main__":
@@ -3,20 +3,26 @@
 Deep dive analysis of queue buildup patterns.
 """
 import sys
-import os
+from pathlib import Path
 import numpy as np
 
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from src.simulation.queue_simulator import QueueSimulator
+from src.simulation._kernels import fifo_schedule
 from examples.scenarios import WEEKDAY_BASIC_SMALL
 
 
 def analyze_queue_buildup():
     """Analyze when and why queues build up."""
     scenario = WEEKDAY_BASIC_SMALL
+    desks_per_hour = scenario.get_hourly_desk_counts()
+    
+    # The detailed flow below uses a fixed pool, so staff it at the schedule's peak
+    num_desks = int(desks_per_hour.max())
+    
     print(f"=== QUEUE BUILDUP ANALYSIS: {scenario.name} ===")
-    print(f"2 desks, 3.0 min average service time")
+    print(f"{num_desks} desks, {scenario.mean_service_time:.1f} min average service time")
     print()
     
     simulator = QueueSimulator(random_seed=42)
@@ -30,80 +36,77 @@ def analyze_queue_buildup():
     print(f"Generated {len(arrival_times)} customers")
     
     # Simulate with detailed tracking
-    num_desks = 2
-    desk_available_times = [0.0] * num_desks
+    wait_times, assigned_desks, _ = fifo_schedule(arrival_times, service_times, np.zeros(num_desks))
+    end_times = arrival_times + wait_times + service_times
     
     print("\\nDetailed customer flow (showing problem periods):")
     
-    max_wait = 0
-    problem_customers = []
+    max_wait = wait_times.max() if len(wait_times) else 0
     
-    for i in range(len(arrival_times)):
-        arrival_time = arrival_times[i]
-        service_time = service_times[i]
-        
-        # Find earliest available desk
-        earliest_desk = min(range(num_desks), key=lambda d: desk_available_times[d])
-        earliest_available_time = desk_available_times[earliest_desk]
-        
-        # When can this customer start service?
-        service_start_time = max(arrival_time, earliest_available_time)
-        wait_time = service_start_time - arrival_time
-        
-        # Update desk availability
-        desk_available_times[earliest_desk] = service_start_time + service_time
-        
-        if wait_time > max_wait:
-            max_wait = wait_time
-        
-        # Track problem customers (wait > 10 minutes)
-        if wait_time > 10.0:
-            problem_customers.append({
-                'customer': i,
-                'arrival_time': arrival_time,
-                'wait_time': wait_time,
-                'service_time': service_time,
-                'hour': int(arrival_time // 60) + scenario.operating_hours[0],
-                'desk_busy_until': [t for t in desk_available_times]
-            })
+    # Track problem customers (wait > 10 minutes) as parallel arrays
+    problem_idx = np.flatnonzero(wait_times > 10.0)
+    problem_arrival = arrival_times[problem_idx]
+    problem_wait = wait_times[problem_idx]
+    problem_service = service_times[problem_idx]
+    problem_hour = (problem_arrival // 60).astype(int) + scenario.operating_hours[0]
     
-    print(f"Total customers with >10 min wait: {len(problem_customers)}")
+    print(f"Total customers with >10 min wait: {len(problem_idx)}")
     print(f"Maximum wait time found: {max_wait:.2f} minutes")
     print()
     
-    if problem_customers:
+    if len(problem_idx):
         print("CUSTOMERS WITH LONG WAITS:")
-        print("Customer | Hour | Arrival | Wait  | Service | Desk1 Busy | Desk2 Busy")
-        print("-" * 70)
+        desk_columns = "".join(f" | Desk{d + 1} Busy" for d in range(num_desks))
+        print(f"Customer | Hour | Arrival | Wait  | Service{desk_columns}")
+        print("-" * (44 + 13 * num_desks))
         
-        for pc in problem_customers[:10]:  # Show first 10 problem customers
-            hour = pc['hour']
-            print(f"{pc['customer']:8d} | {hour:2d}:xx | {pc['arrival_time']:7.2f} | {pc['wait_time']:5.2f} | {pc['service_time']:7.2f} | {pc['desk_busy_until'][0]:10.2f} | {pc['desk_busy_until'][1]:10.2f}")
+        rows = []
+        for k in range(min(10, len(problem_idx))):  # Show first 10 problem customers
+            i = problem_idx[k]
+            
+            # Each desk is busy until the end of the last customer it took so far
+            desk_busy_until = []
+            for d in range(num_desks):
+                served = np.flatnonzero(assigned_desks[:i + 1] == d)
+                desk_busy_until.append(end_times[served[-1]] if len(served) else 0.0)
+            
+            busy_columns = "".join(f" | {busy:10.2f}" for busy in desk_busy_until)
+            rows.append(f"{i:8d} | {problem_hour[k]:2d}:xx | {problem_arrival[k]:7.2f} | {problem_wait[k]:5.2f} | {problem_service[k]:7.2f}{busy_columns}")
+        print("\n".join(rows))
     
-    # Analyze by hour
+    # Analyze by hour; arrivals are sorted, so hour boundaries give index ranges
     print("\\nARRIVAL INTENSITY BY HOUR:")
+    num_hours = scenario.operating_hours[1] - scenario.operating_hours[0]
+    hour_bounds = np.searchsorted(arrival_times, np.arange(num_hours + 1) * 60)
+    expected_rates = np.array([scenario.arrival_rates.get(hour, 0.0)
+                               for hour in range(*scenario.operating_hours)])
+    
+    # Theoretical capacity of each hour: desks * minutes / avg_service_time
+    capacities = desks_per_hour * 60 / scenario.mean_service_time
+    
+    lines = []
     for hour in range(scenario.operating_hours[0], scenario.operating_hours[1]):
-        hour_start = (hour - scenario.operating_hours[0]) * 60
-        hour_end = hour_start + 60
-        hour_arrivals = [t for t in arrival_times if hour_start <= t < hour_end]
-        expected = scenario.arrival_rates.get(hour, 0)
+        hour_offset = hour - scenario.operating_hours[0]
+        start, end = hour_bounds[hour_offset], hour_bounds[hour_offset + 1]
+        num_arrivals = end - start
+        expected = expected_rates[hour_offset]
         
         # Find average service time in this hour
-        hour_indices = [i for i, t in enumerate(arrival_times) if hour_start <= t < hour_end]
-        if hour_indices:
-            hour_service_times = [service_times[i] for i in hour_indices]
-            avg_service = np.mean(hour_service_times)
-            max_service = np.max(hour_service_times)
+        if num_arrivals:
+            hour_service_times = service_times[start:end]
+            avg_service = hour_service_times.mean()
+            max_service = hour_service_times.max()
         else:
             avg_service = max_service = 0
         
-        # Calculate theoretical capacity
-        theoretical_capacity = 2 * 60 / scenario.mean_service_time  # desks * minutes / avg_service_time
+        theoretical_capacity = capacities[hour_offset]
         
-        print(f"{hour:2d}:00 | Arrivals: {len(hour_arrivals):2d} (exp: {expected:2.0f}) | Avg svc: {avg_service:.2f} | Max svc: {max_service:.2f} | Capacity: {theoretical_capacity:.1f}")
+        lines.append(f"{hour:2d}:00 | Arrivals: {num_arrivals:2d} (exp: {expected:2.0f}) | Avg svc: {avg_service:.2f} | Max svc: {max_service:.2f} | Capacity: {theoretical_capacity:.1f}")
         
-        if len(hour_arrivals) > theoretical_capacity * 0.8:  # > 80% of capacity
-            print(f"      *** HIGH UTILIZATION HOUR - Queue likely to form ***")
+        if num_arrivals > theoretical_capacity * 0.8:  # > 80% of capacity
+            lines.append(f"      *** HIGH UTILIZATION HOUR - Queue likely to form ***")
+    
+    print("\n".join(lines))
 
 
 if __name__ == "__main__":
@@ -4,14 +4,74 @@ Quick terminal runner for all scenarios in the Click & Collect Queue Simulation
 """
 import sys
 import os
+from pathlib import Path
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 
 # Add the src directory to the path so we can import our modules
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from src.simulation.monte_carlo import MonteCarloRunner
+from src.simulation.queue_simulator import QueueSimulator
 from examples.scenarios import ALL_SCENARIOS
 
 
+# Replications per scenario, and per pool task; small tasks let idle workers
+# help with the heavier scenarios instead of waiting for them to finish
+NUM_SIMULATIONS = 1000
+REPLICATIONS_PER_TASK = 50
+
+
+def _worker_context():
+    """Return a multiprocessing context whose workers start from preloaded modules.
+    
+    forkserver forks each worker from a server process that has already imported
+    numpy and the simulation package; platforms without it use the default context.
+    """
+    if "forkserver" not in mp.get_all_start_methods():
+        return mp.get_context()
+    
+    ctx = mp.get_context("forkserver")
+    ctx.set_forkserver_preload(["numpy", "src.simulation.monte_carlo"])
+    return ctx
+
+
+def _run_replications(scenario, start, stop):
+    """Run replications start..stop-1 of a scenario in a worker process.
+    
+    Replication i is seeded with i, as in MonteCarloRunner's sequential mode.
+    
+    Args:
+        scenario: Scenario configuration
+        start: Index of the first replication
+        stop: Index after the last replication
+        
+    Returns:
+        Kernel metrics array of shape (stop - start, NUM_METRICS)
+    """
+    return np.array([QueueSimulator(random_seed=i).simulate_metrics(scenario)
+                     for i in range(start, stop)])
+
+
+def _format_max_wait(result, spec, unit):
+    """Format the maximum wait time, which analytical estimates leave as NaN."""
+    return "n/a" if np.isnan(result.max_wait_time) else f"{result.max_wait_time:{spec}} {unit}"
+
+
+def _format_result(result):
+    """Format the key metrics of a scenario as report lines."""
+    return [
+        f"✅ Average Wait Time: {result.avg_wait_time:.2f} minutes",
+        f"✅ 95th Percentile Wait Time: {result.p95_wait_time:.2f} minutes",
+        f"✅ Maximum Wait Time: {_format_max_wait(result, '.2f', 'minutes')}",
+        f"✅ Service Level (≤5min): {result.service_level_5min:.1%}",
+        f"✅ Desk Utilization: {result.desk_utilization:.1%}",
+        f"✅ Expected Daily Customers: {result.total_customers_mean:.0f}",
+        f"✅ Actual Customers Generated: {result.total_customers_mean:.0f} ± {result.total_customers_std:.0f}",
+    ]
+
+
 def run_all_scenarios():
     """Run all available scenarios and display results."""
     print("Click & Collect Queue Simulation System")
@@ -20,31 +80,53 @@ def run_all_scenarios():
     print()
     
     runner = MonteCarloRunner()
-    results = []
+    results_by_index = {}
     
-    for i, scenario in enumerate(ALL_SCENARIOS, 1):
-        print(f"[{i}/{len(ALL_SCENARIOS)}] Running: {scenario.name}")
-        print("-" * 40)
-        
-        try:
+    # Split every scenario into chunks of replications and share them across
+    # all workers; each scenario is reported as soon as its last chunk is in
+    chunks = {i: {} for i in range(len(ALL_SCENARIOS))}
+    pending = {}
+    errors = {}
+    finished = 0
+    
+    with ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                             mp_context=_worker_context()) as executor:
+        futures = {}
+        for i, scenario in enumerate(ALL_SCENARIOS):
             # Run with fewer simulations for faster results
-            scenario.num_simulations = 1000
-            result = runner.run_simulation(scenario, parallel=False)
-            results.append(result)
+            scenario.num_simulations = NUM_SIMULATIONS
+            starts = range(0, NUM_SIMULATIONS, REPLICATIONS_PER_TASK)
+            pending[i] = len(starts)
+            for start in starts:
+                stop = min(start + REPLICATIONS_PER_TASK, NUM_SIMULATIONS)
+                futures[executor.submit(_run_replications, scenario, start, stop)] = (i, start)
+        
+        for future in as_completed(futures):
+            i, start = futures[future]
+            try:
+                chunks[i][start] = future.result()
+            except Exception as e:
+                errors.setdefault(i, e)
             
-            # Display key metrics
-            print(f"✅ Average Wait Time: {result.avg_wait_time:.2f} minutes")
-            print(f"✅ 95th Percentile Wait Time: {result.p95_wait_time:.2f} minutes")
-            print(f"✅ Maximum Wait Time: {result.max_wait_time:.2f} minutes")
-            print(f"✅ Service Level (≤5min): {result.service_level_5min:.1%}")
-            print(f"✅ Desk Utilization: {result.desk_utilization:.1%}")
-            print(f"✅ Expected Daily Customers: {result.total_customers_mean:.0f}")
-            print(f"✅ Actual Customers Generated: {result.total_customers_mean:.0f} ± {result.total_customers_std:.0f}")
+            pending[i] -= 1
+            if pending[i]:
+                continue
             
-        except Exception as e:
-            print(f"❌ Error: {e}")
-        
-        print()
+            scenario = ALL_SCENARIOS[i]
+            if i in errors:
+                lines = [f"❌ Error: {errors[i]}"]
+            else:
+                replications = np.concatenate([chunks[i][start] for start in sorted(chunks[i])])
+                results_by_index[i] = runner.aggregate(scenario, replications)
+                lines = _format_result(results_by_index[i])
+            
+            finished += 1
+            header = [f"[{finished}/{len(ALL_SCENARIOS)}] Finished: {scenario.name}", "-" * 40]
+            sys.stdout.write("\n".join(header + lines) + "\n\n")
+            sys.stdout.flush()
+    
+    # Keep the summary in scenario order
+    results = [results_by_index[i] for i in sorted(results_by_index)]
     
     # Summary comparison
     if results:
@@ -53,9 +135,11 @@ def run_all_scenarios():
         print(f"{'Scenario':<25} {'Avg Wait':<10} {'P95 Wait':<10} {'Max Wait':<10} {'Service Level':<14} {'Utilization':<12} {'Customers':<12}")
         print("-" * 130)
         
+        rows = []
         for result in results:
             name = result.scenario_name[:24]  # Truncate long names
-            print(f"{name:<25} {result.avg_wait_time:>6.2f} min {result.p95_wait_time:>6.2f} min {result.max_wait_time:>6.2f} min {result.service_level_5min:>10.1%} {result.desk_utilization:>10.1%} {result.total_customers_mean:>8.0f}")
+            rows.append(f"{name:<25} {result.avg_wait_time:>6.2f} min {result.p95_wait_time:>6.2f} min {_format_max_wait(result, '>6.2f', 'min'):>10} {result.service_level_5min:>10.1%} {result.desk_utilization:>10.1%} {result.total_customers_mean:>8.0f}")
+        sys.stdout.write("\n".join(rows) + "\n")
 
 
 def run_single_scenario(scenario_name=None):
@@ -111,16 +195,17 @@ def main():
         if command == "all":
             run_all_scenarios()
         elif command == "list":
-            print("Available scenarios:")
+            lines = ["Available scenarios:"]
             for i, scenario in enumerate(ALL_SCENARIOS, 1):
-                print(f"  {i}. {scenario.name}")
-                print(f"     Operating: {scenario.operating_hours[0]}:00-{scenario.operating_hours[1]}:00")
-                print(f"     Service time: {scenario.mean_service_time} min")
+                lines.append(f"  {i}. {scenario.name}")
+                lines.append(f"     Operating: {scenario.operating_hours[0]}:00-{scenario.operating_hours[1]}:00")
+                lines.append(f"     Service time: {scenario.mean_service_time} min")
                 if scenario.num_desks:
-                    print(f"     Desks: {scenario.num_desks} (constant)")
+                    lines.append(f"     Desks: {scenario.num_desks} (constant)")
                 else:
-                    print(f"     Desks: Variable")
-                print()
+                    lines.append(f"     Desks: Variable")
+                lines.append("")
+            sys.stdout.write("\n".join(lines) + "\n")
         elif command in ["help", "-h", "--help"]:
             print("Usage:")
             print("  python run_scenarios.py all       - Run all scenarios")
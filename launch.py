@@ -2,7 +2,6 @@
 """
 Launch script for the Click & Collect Queue Simulation System.
 """
-import subprocess
 import sys
 import os
 
@@ -34,16 +33,16 @@ def main():
     print("🛑 Press Ctrl+C to stop the server")
     print()
     
+    # Replace this process with Streamlit so it receives Ctrl+C directly;
+    # flush first, as exec discards anything still buffered
+    sys.stdout.flush()
     try:
-        # Launch Streamlit
-        subprocess.run([
+        os.execv(python_path, [
             python_path, "-m", "streamlit", "run", app_path,
             "--server.port", "8501",
             "--server.address", "localhost"
         ])
-    except KeyboardInterrupt:
-        print("\n👋 Shutting down the simulation system...")
-    except Exception as e:
+    except OSError as e:
         print(f"❌ Error launching application: {e}")
         sys.exit(1)
 
@@ -1,8 +1,9 @@
 """
 Data models for the queue simulation system using Pydantic for validation.
 """
+from dataclasses import dataclass, field
 from typing import Dict, Optional, Tuple, Union
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
 import numpy as np
 
 
@@ -16,15 +17,18 @@ class ScenarioConfig(BaseModel):
     mean_service_time: float = Field(..., gt=0, description="Mean service time in minutes")
     operating_hours: Tuple[int, int] = Field(..., description="Operating hours as (start_hour, end_hour)")
     num_simulations: int = Field(1000, gt=0, description="Number of Monte Carlo simulation runs")
+    qmc: bool = Field(False, description="Draw the hourly arrival counts of each run from one scrambled Sobol sequence")
     
-    @validator('operating_hours')
+    @field_validator('operating_hours')
+    @classmethod
     def validate_operating_hours(cls, v):
         start, end = v
         if start >= end or start < 0 or end > 24:
             raise ValueError("Invalid operating hours: start must be < end, both must be 0-24")
         return v
     
-    @validator('arrival_rates')
+    @field_validator('arrival_rates')
+    @classmethod
     def validate_arrival_rates(cls, v):
         for hour, rate in v.items():
             if hour < 0 or hour > 23:
@@ -33,9 +37,10 @@ class ScenarioConfig(BaseModel):
                 raise ValueError(f"Invalid arrival rate {rate}: must be >= 0")
         return v
     
-    @validator('desk_schedule')
-    def validate_desk_schedule(cls, v, values):
-        if v is not None and 'num_desks' in values and values['num_desks'] is not None:
+    @field_validator('desk_schedule')
+    @classmethod
+    def validate_desk_schedule(cls, v, info: ValidationInfo):
+        if v is not None and info.data.get('num_desks') is not None:
             raise ValueError("Cannot specify both num_desks and desk_schedule")
         if v is not None:
             for hour, desks in v.items():
@@ -50,16 +55,22 @@ class ScenarioConfig(BaseModel):
         if self.desk_schedule is not None:
             return self.desk_schedule.get(hour, 1)
         return self.num_desks or 1
+    
+    def get_hourly_desk_counts(self) -> np.ndarray:
+        """Get the number of desks for each operating hour, starting at opening."""
+        start_hour, end_hour = self.operating_hours
+        return np.array([self.get_desk_count(hour) for hour in range(start_hour, end_hour)],
+                        dtype=np.int64)
 
 
+@dataclass(slots=True, eq=False)
 class Customer:
     """Represents a customer in the queue system."""
     
-    def __init__(self, customer_id: int, arrival_time: float):
-        self.customer_id = customer_id
-        self.arrival_time = arrival_time
-        self.service_start_time: Optional[float] = None
-        self.departure_time: Optional[float] = None
+    customer_id: int
+    arrival_time: float
+    service_start_time: Optional[float] = field(default=None, init=False)
+    departure_time: Optional[float] = field(default=None, init=False)
     
     @property
     def wait_time(self) -> Optional[float]:
@@ -83,21 +94,21 @@ class Customer:
         return self.departure_time - self.arrival_time
 
 
+@dataclass(slots=True, eq=False)
 class Desk:
     """Represents a service desk."""
     
-    def __init__(self, desk_id: int):
-        self.desk_id = desk_id
-        self.current_customer: Optional[Customer] = None
-        self.next_available_time: float = 0.0
-        self.total_service_time: float = 0.0
-        self.customers_served: int = 0
+    desk_id: int
+    current_customer: Optional[Customer] = field(default=None, init=False)
+    next_available_time: float = field(default=0.0, init=False)
+    total_service_time: float = field(default=0.0, init=False)
+    customers_served: int = field(default=0, init=False)
     
     def is_available(self, time: float) -> bool:
         """Check if desk is available at given time."""
         return time >= self.next_available_time
     
-    def start_service(self, customer: Customer, start_time: float, service_duration: float):
+    def start_service(self, customer: Customer, start_time: float, service_duration: float) -> None:
         """Start serving a customer."""
         self.current_customer = customer
         customer.service_start_time = start_time
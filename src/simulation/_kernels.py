@@ -0,0 +1,216 @@
+"""
+Compiled kernels for the queue simulation hot loops.
+
+The kernels only take NumPy arrays and scalars so they can be compiled with
+Numba. When Numba is not installed they run as plain Python functions.
+"""
+import os
+import numpy as np
+
+# Keep compiled kernels (cache=True) in one place at the project root so they
+# survive across script runs; NUMBA_CACHE_DIR set by the user still wins
+os.environ.setdefault(
+    "NUMBA_CACHE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".numba_cache"))
+)
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - exercised only without numba
+    NUMBA_AVAILABLE = False
+    prange = range
+    
+    def njit(*args, **kwargs):
+        """No-op replacement for numba.njit, with or without arguments."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+# Column layout of the per-simulation metrics array returned by the kernels
+AVG_WAIT = 0
+MAX_WAIT = 1
+P95_WAIT = 2
+AVG_QUEUE_LENGTH = 3
+MAX_QUEUE_LENGTH = 4
+DESK_UTILIZATION = 5
+SERVICE_LEVEL_5MIN = 6
+TOTAL_CUSTOMERS = 7
+NUM_METRICS = 8
+
+
+@njit(cache=True, nogil=True)
+def simulate_day(arrivals, services, desks_per_hour, total_minutes):
+    """Simulate one day of the multi-desk FIFO queue.
+    
+    Each customer is served by the earliest available desk among the desks
+    open at their arrival time.
+    
+    Args:
+        arrivals: Sorted arrival times in minutes from start of operating hours
+        services: Service time of each customer in minutes
+        desks_per_hour: Number of open desks for each operating hour
+        total_minutes: Length of the operating day in minutes
+    
+    Returns:
+        Array of NUM_METRICS simulation metrics
+    """
+    metrics = np.zeros(NUM_METRICS)
+    num_customers = arrivals.shape[0]
+    if num_customers == 0:
+        metrics[SERVICE_LEVEL_5MIN] = 1.0
+        return metrics
+    
+    num_hours = desks_per_hour.shape[0]
+    max_desks = desks_per_hour.max()
+    desk_free_at = np.zeros(max_desks)
+    desk_busy_time = np.zeros(max_desks)
+    wait_times = np.empty(num_customers)
+    start_times = np.empty(num_customers)
+    
+    # Wait reductions are accumulated while scheduling; only the p95 needs
+    # the full wait_times array
+    total_wait = 0.0
+    max_wait = 0.0
+    served_within_5min = 0
+    
+    for i in range(num_customers):
+        arrival = arrivals[i]
+        hour = min(int(arrival // 60), num_hours - 1)
+        
+        # Earliest available desk among those currently open
+        desk = 0
+        for d in range(1, desks_per_hour[hour]):
+            if desk_free_at[d] < desk_free_at[desk]:
+                desk = d
+        
+        start = max(arrival, desk_free_at[desk])
+        desk_free_at[desk] = start + services[i]
+        desk_busy_time[desk] += services[i]
+        
+        wait = start - arrival
+        wait_times[i] = wait
+        start_times[i] = start
+        total_wait += wait
+        if wait > max_wait:
+            max_wait = wait
+        if wait <= 5.0:
+            served_within_5min += 1
+    
+    # Queue length seen by each arriving customer: everyone who has arrived
+    # (including them) but has not started service yet. Arrivals are sorted,
+    # so one merge pass over the sorted start times counts who has started.
+    start_times.sort()
+    started = 0
+    total_queue = 0
+    max_queue = 0
+    for i in range(num_customers):
+        while started < num_customers and start_times[started] <= arrivals[i]:
+            started += 1
+        queue_length = max(i + 1 - started, 0)
+        total_queue += queue_length
+        if queue_length > max_queue:
+            max_queue = queue_length
+    
+    utilization_sum = 0.0
+    active_desks = 0
+    for d in range(max_desks):
+        if desk_busy_time[d] > 0:
+            utilization_sum += min(1.0, desk_busy_time[d] / total_minutes)
+            active_desks += 1
+    
+    metrics[AVG_WAIT] = total_wait / num_customers
+    metrics[MAX_WAIT] = max_wait
+    metrics[P95_WAIT] = np.percentile(wait_times, 95)
+    metrics[AVG_QUEUE_LENGTH] = total_queue / num_customers
+    metrics[MAX_QUEUE_LENGTH] = max_queue
+    metrics[DESK_UTILIZATION] = utilization_sum / active_desks if active_desks else 0.0
+    metrics[SERVICE_LEVEL_5MIN] = served_within_5min / num_customers
+    metrics[TOTAL_CUSTOMERS] = num_customers
+    return metrics
+
+
+@njit(parallel=True, cache=True)
+def simulate_replications(arrivals, services, offsets, desks_per_hour, total_minutes):
+    """Simulate many independent days in parallel.
+    
+    The customers of all simulations are stored back to back: simulation i
+    owns ``arrivals[offsets[i]:offsets[i + 1]]`` and the matching services.
+    
+    Args:
+        arrivals: Concatenated arrival times of all simulations
+        services: Concatenated service times of all simulations
+        offsets: Start index of each simulation, plus the total length
+        desks_per_hour: Number of open desks for each operating hour
+        total_minutes: Length of the operating day in minutes
+    
+    Returns:
+        Array of shape (num_simulations, NUM_METRICS)
+    """
+    num_simulations = offsets.shape[0] - 1
+    results = np.empty((num_simulations, NUM_METRICS))
+    for i in prange(num_simulations):
+        start, end = offsets[i], offsets[i + 1]
+        results[i] = simulate_day(arrivals[start:end], services[start:end],
+                                  desks_per_hour, total_minutes)
+    return results
+
+
+@njit(cache=True, nogil=True)
+def fifo_schedule(arrivals, services, desk_free_at):
+    """Assign customers to the earliest available desk, in arrival order.
+    
+    Unlike simulate_day this uses a fixed pool of desks for the whole day and
+    returns per-customer detail for the diagnostic scripts.
+    
+    Args:
+        arrivals: Sorted arrival times in minutes
+        services: Service time of each customer in minutes
+        desk_free_at: Time each desk becomes free; updated in place
+    
+    Returns:
+        Tuple of (wait times, desk index serving each customer, number of
+        desks busy just after each customer is assigned)
+    """
+    num_customers = arrivals.shape[0]
+    num_desks = desk_free_at.shape[0]
+    wait_times = np.empty(num_customers)
+    assigned_desks = np.empty(num_customers, dtype=np.int64)
+    busy_desks = np.empty(num_customers, dtype=np.int64)
+    
+    for i in range(num_customers):
+        arrival = arrivals[i]
+        
+        desk = 0
+        for d in range(1, num_desks):
+            if desk_free_at[d] < desk_free_at[desk]:
+                desk = d
+        
+        start = max(arrival, desk_free_at[desk])
+        desk_free_at[desk] = start + services[i]
+        wait_times[i] = start - arrival
+        assigned_desks[i] = desk
+        
+        busy = 0
+        for d in range(num_desks):
+            if desk_free_at[d] > arrival:
+                busy += 1
+        busy_desks[i] = busy
+    
+    return wait_times, assigned_desks, busy_desks
+
+
+def warm_up():
+    """Compile every kernel, or load it from the on-disk cache, ahead of first use.
+    
+    Call this at start-up wherever the latency of the first simulation matters,
+    e.g. in the web app. Without Numba it only runs the tiny inputs below.
+    """
+    arrivals = np.array([0.0, 1.0])
+    services = np.array([1.0, 1.0])
+    desks = np.array([1], dtype=np.int64)
+    
+    simulate_day(arrivals, services, desks, 60.0)
+    simulate_replications(arrivals, services, np.array([0, 2], dtype=np.int64), desks, 60.0)
+    fifo_schedule(arrivals, services, np.zeros(1))
@@ -1,69 +1,177 @@
 """
 Customer arrival generation using time-varying Poisson process.
 """
+import warnings
 import numpy as np
-from typing import Dict, List, Tuple
+from scipy.stats import poisson, qmc
+from typing import Dict, List, Optional, Tuple, Union
 from ..models import ScenarioConfig
 
 
 class ArrivalGenerator:
     """Generates customer arrival times using time-varying Poisson process."""
     
-    def __init__(self, random_seed: int = None):
+    def __init__(self, random_seed: Union[int, np.random.SeedSequence, np.random.Generator] = None):
         """Initialize the arrival generator.
         
         Args:
-            random_seed: Random seed for reproducibility
+            random_seed: Random seed (or SeedSequence) for reproducibility, or
+                         an existing Generator to draw from
         """
-        self.rng = np.random.RandomState(random_seed)
+        self.rng = np.random.default_rng(random_seed)
     
-    def generate_arrivals(self, scenario: ScenarioConfig) -> List[float]:
+    @staticmethod
+    def spawn_seeds(random_seed: Optional[int], num_streams: int) -> List[np.random.SeedSequence]:
+        """Derive independent seeds for generators running in parallel.
+        
+        Args:
+            random_seed: Root seed the streams are derived from (fresh OS
+                         entropy if None)
+            num_streams: Number of independent streams
+            
+        Returns:
+            List of SeedSequence objects, one per stream
+        """
+        return np.random.SeedSequence(random_seed).spawn(num_streams)
+    
+    def generate_arrivals(self, scenario: ScenarioConfig,
+                          counts: Optional[np.ndarray] = None) -> np.ndarray:
         """Generate customer arrival times for a scenario.
         
+        A single day is a single point, so ``scenario.qmc`` has no effect
+        here; pass that day's row of generate_hourly_counts to use it.
+        
         Args:
             scenario: Scenario configuration containing arrival rates and operating hours
+            counts: Customers per operating hour, drawn here if None
             
         Returns:
-            List of arrival times in minutes from start of operating hours
+            Sorted array of arrival times in minutes from start of operating hours
         """
-        arrivals = []
-        start_hour, end_hour = scenario.operating_hours
+        if counts is None:
+            # One vectorized Poisson draw for the customer counts of all hours
+            counts = self.rng.poisson(self._hourly_rates(scenario))
+        offsets, times = self._arrivals_from_counts(np.asarray(counts)[np.newaxis])
+        return times
+    
+    def generate_arrivals_batch(self, scenario: ScenarioConfig, num_simulations: int,
+                                counts: Optional[np.ndarray] = None
+                                ) -> Tuple[np.ndarray, np.ndarray]:
+        """Generate the arrivals of many independent days in a few vectorized draws.
         
-        for hour in range(start_hour, end_hour):
-            if hour in scenario.arrival_rates:
-                rate = scenario.arrival_rates[hour]
-                hour_arrivals = self._generate_hour_arrivals(hour - start_hour, rate)
-                arrivals.extend(hour_arrivals)
+        Args:
+            scenario: Scenario configuration containing arrival rates and operating hours
+            num_simulations: Number of days to generate
+            counts: Customers per (day, hour), e.g. a slice of the
+                    generate_hourly_counts of a whole run; drawn here if None
+            
+        Returns:
+            Tuple of (offsets, arrival times): day i owns
+            ``times[offsets[i]:offsets[i + 1]]``, sorted, in minutes from opening
+        """
+        if counts is None:
+            counts = self.generate_hourly_counts(scenario, num_simulations)
+        return self._arrivals_from_counts(counts)
+    
+    def generate_hourly_counts(self, scenario: ScenarioConfig,
+                               num_simulations: int) -> np.ndarray:
+        """Draw the number of customers arriving in each hour of many days.
         
-        return sorted(arrivals)
+        With ``scenario.qmc`` the days are spread evenly only across this one
+        call, so draw the counts of a whole run at once and slice them into
+        batches rather than calling this per batch.
+        
+        Args:
+            scenario: Scenario configuration containing arrival rates and operating hours
+            num_simulations: Number of days to draw
+            
+        Returns:
+            Integer array of customers per (day, hour)
+        """
+        rates = self._hourly_rates(scenario)
+        if scenario.qmc:
+            return self._quasi_random_counts(rates, num_simulations)
+        return self.rng.poisson(rates, size=(num_simulations, len(rates)))
     
-    def _generate_hour_arrivals(self, hour_offset: int, rate: float) -> List[float]:
-        """Generate arrivals for a single hour using Poisson process.
+    @staticmethod
+    def _hourly_rates(scenario: ScenarioConfig) -> np.ndarray:
+        """Get the arrival rate of each operating hour, starting at opening."""
+        start_hour, end_hour = scenario.operating_hours
+        return np.array([scenario.arrival_rates.get(hour, 0.0)
+                         for hour in range(start_hour, end_hour)])
+    
+    def _arrivals_from_counts(self, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Place the customers of each (day, hour) count uniformly within their hour.
         
         Args:
-            hour_offset: Hour offset from start of operating hours
-            rate: Arrival rate (customers per hour)
+            counts: Integer array of customers per (day, hour)
             
         Returns:
-            List of arrival times within the hour
+            Tuple of (offsets, arrival times) as for generate_arrivals_batch
         """
-        if rate <= 0:
-            return []
+        num_simulations, num_hours = counts.shape
+        offsets = np.zeros(num_simulations + 1, dtype=np.int64)
+        np.cumsum(counts.sum(axis=1), out=offsets[1:])
+        
+        hour_starts = np.tile(np.arange(num_hours) * 60.0, num_simulations)
+        times = np.repeat(hour_starts, counts.ravel()) + self.rng.uniform(0, 60, offsets[-1])
+        
+        # Times follow the hours in order but are unsorted within each hour.
+        # One in-place sort per day orders them with a single call per day,
+        # rather than one per (day, hour) as sorting hour by hour would need
+        for i in range(num_simulations):
+            times[offsets[i]:offsets[i + 1]].sort()
+        
+        if __debug__:
+            self._assert_valid(offsets, times, num_hours * 60.0)
+        return offsets, times
+    
+    @staticmethod
+    def _assert_valid(offsets: np.ndarray, times: np.ndarray, span_minutes: float) -> None:
+        """Check that every day's arrivals are sorted and within operating hours.
         
-        # Generate number of arrivals for this hour using Poisson distribution
-        num_arrivals = self.rng.poisson(rate)
+        Runs in a few vectorized passes; skipped entirely under ``python -O``.
         
-        if num_arrivals == 0:
-            return []
+        Args:
+            offsets: Start index of each day, plus the total length
+            times: Concatenated arrival times of all days
+            span_minutes: Length of the operating day in minutes
+        """
+        assert np.all((times >= 0) & (times < span_minutes)), "arrival outside operating hours"
         
-        # Generate arrival times uniformly within the hour
-        hour_start = hour_offset * 60  # Convert to minutes
-        arrival_times = self.rng.uniform(hour_start, hour_start + 60, num_arrivals)
+        # Ignore the steps from one day's last arrival to the next day's first
+        steps = np.diff(times)
+        day_starts = offsets[1:-1]
+        steps[day_starts[(day_starts > 0) & (day_starts < len(times))] - 1] = 0.0
+        assert np.all(steps >= 0), "arrivals out of order within a day"
+    
+    def _quasi_random_counts(self, rates: np.ndarray, num_simulations: int) -> np.ndarray:
+        """Draw hourly Poisson arrival counts by randomized quasi-Monte Carlo.
+        
+        Each day is one point of a scrambled Sobol sequence with a dimension per
+        hour, mapped through the Poisson inverse CDF, so the days cover the
+        range of busy and quiet hours more evenly than independent draws.
         
-        return arrival_times.tolist()
+        Args:
+            rates: Arrival rate of each operating hour (customers per hour)
+            num_simulations: Number of days to draw
+            
+        Returns:
+            Integer array of shape (num_simulations, len(rates))
+        """
+        sobol = qmc.Sobol(len(rates), scramble=True, seed=self.rng)
+        if num_simulations & (num_simulations - 1) == 0:
+            # Powers of 2 give the best balanced point sets
+            points = sobol.random_base2(num_simulations.bit_length() - 1)
+        else:
+            with warnings.catch_warnings():
+                # Other run sizes take the leading points, which are still well spread
+                warnings.filterwarnings("ignore", message=".*balance properties.*")
+                points = sobol.random(num_simulations)
+        return poisson.ppf(points, rates).astype(np.int64)
     
     def generate_service_times(self, num_customers: int, mean_service_time: float, 
-                             coefficient_of_variation: float = 0.5) -> List[float]:
+                             coefficient_of_variation: float = 0.5) -> np.ndarray:
         """Generate service times using lognormal distribution.
         
         Args:
@@ -73,10 +181,10 @@ class ArrivalGenerator:
                                     Higher values = more variability
                                     
         Returns:
-            List of service times in minutes
+            Array of service times in minutes
         """
         if num_customers == 0:
-            return []
+            return np.empty(0)
         
         # Use lognormal distribution with given mean and coefficient of variation
         # For lognormal: mean = exp(mu + sigma^2/2)
@@ -85,8 +193,7 @@ class ArrivalGenerator:
         sigma = np.sqrt(np.log(cv**2 + 1))
         mu = np.log(mean_service_time) - sigma**2 / 2
         
-        service_times = self.rng.lognormal(mu, sigma, num_customers)
-        return service_times.tolist()
+        return self.rng.lognormal(mu, sigma, num_customers)
     
     def validate_arrival_pattern(self, arrival_rates: Dict[int, float], 
                                 operating_hours: Tuple[int, int]) -> Dict[str, float]:
@@ -100,17 +207,14 @@ class ArrivalGenerator:
             Dictionary with pattern statistics
         """
         start_hour, end_hour = operating_hours
-        total_arrivals = 0
-        peak_rate = 0
-        peak_hour = None
-        
-        for hour in range(start_hour, end_hour):
-            rate = arrival_rates.get(hour, 0)
-            total_arrivals += rate
-            
-            if rate > peak_rate:
-                peak_rate = rate
-                peak_hour = hour
+        rates = np.array([arrival_rates.get(hour, 0) for hour in range(start_hour, end_hour)],
+                         dtype=np.float64)
+        total_arrivals = float(rates.sum())
+        
+        # argmax returns the first of equal peaks; a day without arrivals has no peak hour
+        peak = int(rates.argmax()) if rates.size else 0
+        peak_rate = float(rates[peak]) if rates.size else 0.0
+        peak_hour = start_hour + peak if peak_rate > 0 else None
         
         operating_duration = end_hour - start_hour
         avg_rate = total_arrivals / operating_duration if operating_duration > 0 else 0
@@ -2,27 +2,86 @@
 Monte Carlo simulation runner with parallel processing and statistical analysis.
 """
 import numpy as np
-from typing import List, Dict, Tuple
+from functools import lru_cache
+from scipy import stats
+from typing import Callable, List, Dict, Optional
 from concurrent.futures import ProcessPoolExecutor, as_completed
 import multiprocessing as mp
-from ..models import ScenarioConfig, SimulationResults, MonteCarloResults
+from ..models import ScenarioConfig, MonteCarloResults
+from .arrival_generator import ArrivalGenerator
 from .queue_simulator import QueueSimulator
+from . import _kernels
+from ._kernels import NUM_METRICS, NUMBA_AVAILABLE, simulate_replications
 
 
-def run_single_simulation(scenario_dict: dict, seed: int) -> dict:
-    """Run a single simulation - used for multiprocessing.
+# Aggregated metrics and the kernel metrics column each one is read from
+AGGREGATED_METRICS = {
+    'avg_wait_time': _kernels.AVG_WAIT,
+    'max_wait_time': _kernels.MAX_WAIT,
+    'p95_wait_time': _kernels.P95_WAIT,
+    'avg_queue_length': _kernels.AVG_QUEUE_LENGTH,
+    'desk_utilization': _kernels.DESK_UTILIZATION,
+    'service_level_5min': _kernels.SERVICE_LEVEL_5MIN,
+    'total_customers': _kernels.TOTAL_CUSTOMERS
+}
+
+
+@lru_cache(maxsize=None)
+def _t_critical(degrees_freedom: int, confidence_level: float) -> float:
+    """Two-sided critical value of the t-distribution, cached per sample size.
+    
+    Args:
+        degrees_freedom: Degrees of freedom (number of runs minus one)
+        confidence_level: Confidence level (e.g., 0.95 for 95%)
+        
+    Returns:
+        Critical value of the t-distribution
+    """
+    alpha = 1 - confidence_level
+    return float(stats.t.ppf(1 - alpha/2, degrees_freedom))
+
+
+def simulate_batch(scenario: ScenarioConfig, generator: ArrivalGenerator,
+                   counts: np.ndarray) -> np.ndarray:
+    """Draw and simulate a batch of independent days.
     
     Args:
-        scenario_dict: Scenario configuration as dictionary
-        seed: Random seed for this simulation run
+        scenario: Scenario configuration
+        generator: Arrival generator providing the remaining random draws
+        counts: Customers per (day, hour) of the batch, one row per run
         
     Returns:
-        Simulation results as dictionary
+        Kernel metrics array of shape (len(counts), NUM_METRICS)
     """
-    scenario = ScenarioConfig(**scenario_dict)
-    simulator = QueueSimulator(random_seed=seed)
-    result = simulator.simulate(scenario)
-    return result.dict()
+    offsets, arrivals = generator.generate_arrivals_batch(scenario, len(counts), counts)
+    
+    # Draw the service times of every simulation in a single batch
+    services = generator.generate_service_times(int(offsets[-1]), scenario.mean_service_time)
+    
+    return simulate_replications(
+        arrivals,
+        services,
+        offsets,
+        scenario.get_hourly_desk_counts(),
+        float((scenario.operating_hours[1] - scenario.operating_hours[0]) * 60)
+    )
+
+
+def run_simulation_batch(scenario_dict: dict, seed: np.random.SeedSequence,
+                         counts: np.ndarray) -> np.ndarray:
+    """Run a batch of simulations - used for multiprocessing.
+    
+    Args:
+        scenario_dict: Fields of an already validated scenario configuration
+        seed: Seed of this batch's independent random stream
+        counts: Customers per (day, hour) of the batch, one row per run
+        
+    Returns:
+        Kernel metrics array of shape (len(counts), NUM_METRICS)
+    """
+    # The parent validated the scenario already; skip re-running the validators
+    scenario = ScenarioConfig.model_construct(**scenario_dict)
+    return simulate_batch(scenario, ArrivalGenerator(seed), counts)
 
 
 class MonteCarloRunner:
@@ -35,103 +94,193 @@ class MonteCarloRunner:
             max_workers: Maximum number of parallel workers (defaults to CPU count)
         """
         self.max_workers = max_workers or mp.cpu_count()
+        self._executor = None
+    
+    def __enter__(self) -> "MonteCarloRunner":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Shut down the worker processes, if any were started.
+        
+        The runner can still be used afterwards; a new pool is started on demand.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
     
     def run_simulation(self, scenario: ScenarioConfig, 
-                      parallel: bool = True) -> MonteCarloResults:
+                      parallel: bool = True,
+                      progress_callback: Optional[Callable[[int, int], None]] = None,
+                      use_analytic: bool = False,
+                      seed: Optional[int] = None
+                      ) -> MonteCarloResults:
         """Run Monte Carlo simulation for a scenario.
         
         Args:
             scenario: Scenario configuration
             parallel: Whether to run simulations in parallel
+            progress_callback: Optional function called as (completed, total)
+                               while the simulations run
+            use_analytic: Return the Erlang-C estimate of
+                          QueueSimulator.simulate_analytic as a single run
+                          instead of simulating, when every hour has a steady state
+            seed: Root seed that every run's random stream is spawned from,
+                  for reproducible results (fresh OS entropy if None)
             
         Returns:
             Aggregated Monte Carlo results with confidence intervals
         """
+        if use_analytic:
+            metrics = QueueSimulator.simulate_analytic(scenario)
+            if metrics is not None:
+                return self.aggregate(scenario, metrics[np.newaxis])
+        
         if parallel and scenario.num_simulations > 1:
-            results = self._run_parallel(scenario)
+            if NUMBA_AVAILABLE:
+                results = self._run_compiled(scenario, progress_callback, seed)
+            else:
+                results = self._run_parallel(scenario, progress_callback, seed)
         else:
-            results = self._run_sequential(scenario)
-        
-        return self._aggregate_results(scenario, results)
-    
-    def _run_parallel(self, scenario: ScenarioConfig) -> List[SimulationResults]:
-        """Run simulations in parallel using multiprocessing."""
-        scenario_dict = scenario.dict()
-        seeds = np.random.randint(0, 2**31 - 1, scenario.num_simulations)
-        results = []
-        
-        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit all simulation jobs
-            future_to_seed = {
-                executor.submit(run_single_simulation, scenario_dict, seed): seed 
-                for seed in seeds
-            }
-            
-            # Collect results as they complete
-            for future in as_completed(future_to_seed):
-                try:
-                    result_dict = future.result()
-                    result = SimulationResults(**result_dict)
-                    results.append(result)
-                except Exception as e:
-                    print(f"Simulation failed with seed {future_to_seed[future]}: {e}")
+            results = self._run_sequential(scenario, progress_callback, seed)
         
-        return results
+        return self.aggregate(scenario, results)
     
-    def _run_sequential(self, scenario: ScenarioConfig) -> List[SimulationResults]:
+    def _run_compiled(self, scenario: ScenarioConfig,
+                      progress_callback: Optional[Callable[[int, int], None]] = None,
+                      seed: Optional[int] = None
+                      ) -> np.ndarray:
+        """Run all simulations in multi-threaded compiled kernel calls."""
+        generator = ArrivalGenerator(np.random.SeedSequence(seed))
+        num_simulations = scenario.num_simulations
+        metrics = np.empty((num_simulations, NUM_METRICS))
+        
+        # Draw the hourly counts of all runs at once so a quasi-random
+        # sequence is spread over the whole run, not restarted per chunk
+        counts = generator.generate_hourly_counts(scenario, num_simulations)
+        
+        # The kernel cannot call back into Python, so report progress between
+        # chunks of about 1/50th of the runs (one single call without a callback)
+        chunk_size = -(-num_simulations // 50) if progress_callback else num_simulations
+        
+        for start in range(0, num_simulations, chunk_size):
+            stop = min(start + chunk_size, num_simulations)
+            metrics[start:stop] = simulate_batch(scenario, generator, counts[start:stop])
+            if progress_callback:
+                progress_callback(stop, num_simulations)
+        
+        return metrics
+    
+    def _run_parallel(self, scenario: ScenarioConfig,
+                      progress_callback: Optional[Callable[[int, int], None]] = None,
+                      seed: Optional[int] = None
+                      ) -> np.ndarray:
+        """Run simulations in parallel batches using multiprocessing."""
+        scenario_dict = scenario.model_dump()
+        num_simulations = scenario.num_simulations
+        batch_size = max(1, num_simulations // (4 * self.max_workers))
+        root = np.random.SeedSequence(seed)
+        batches = []
+        
+        # Draw the hourly counts of all runs here and hand each batch its slice,
+        # so a quasi-random sequence is spread over the whole run
+        counts = ArrivalGenerator(root).generate_hourly_counts(scenario, num_simulations)
+        batch_counts = np.split(counts, range(batch_size, num_simulations, batch_size))
+        
+        # Submit all simulation batches
+        executor = self._get_executor()
+        future_to_batch = {
+            executor.submit(run_simulation_batch, scenario_dict, batch_seed, batch): (batch_seed, len(batch))
+            for batch_seed, batch in zip(root.spawn(len(batch_counts)), batch_counts)
+        }
+        
+        # Collect results as they complete
+        completed = 0
+        for future in as_completed(future_to_batch):
+            batch_seed, size = future_to_batch[future]
+            try:
+                batches.append(future.result())
+            except Exception as e:
+                print(f"Simulation batch failed with seed {batch_seed}: {e}")
+            completed += size
+            if progress_callback:
+                progress_callback(completed, num_simulations)
+        
+        return np.concatenate(batches) if batches else np.empty((0, NUM_METRICS))
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Get the process pool, starting it on first use and reusing it afterwards."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+    
+    def _run_sequential(self, scenario: ScenarioConfig,
+                        progress_callback: Optional[Callable[[int, int], None]] = None,
+                        seed: Optional[int] = None
+                        ) -> np.ndarray:
         """Run simulations sequentially."""
-        results = []
-        simulator = QueueSimulator()
+        metrics = np.empty((scenario.num_simulations, NUM_METRICS))
         
-        for i in range(scenario.num_simulations):
-            # Use different seed for each run
-            simulator = QueueSimulator(random_seed=i)
-            result = simulator.simulate(scenario)
-            results.append(result)
+        # Use a different seed for each run: the run index, or a stream
+        # spawned from the root seed when one is given
+        if seed is None:
+            seeds = range(scenario.num_simulations)
+        else:
+            seeds = ArrivalGenerator.spawn_seeds(seed, scenario.num_simulations)
         
-        return results
+        # Quasi-random hourly counts only spread evenly when drawn for all runs at once
+        counts = None
+        if scenario.qmc:
+            counts = ArrivalGenerator(seed).generate_hourly_counts(scenario, scenario.num_simulations)
+        
+        for i, run_seed in enumerate(seeds):
+            simulator = QueueSimulator(random_seed=run_seed)
+            metrics[i] = simulator.simulate_metrics(scenario, None if counts is None else counts[i])
+            
+            if progress_callback:
+                progress_callback(i + 1, scenario.num_simulations)
+        
+        return metrics
     
-    def _aggregate_results(self, scenario: ScenarioConfig, 
-                          results: List[SimulationResults]) -> MonteCarloResults:
+    def aggregate(self, scenario: ScenarioConfig, 
+                  metrics: np.ndarray) -> MonteCarloResults:
         """Aggregate individual simulation results with statistical analysis.
         
+        Use this to merge runs made outside the runner, e.g. rows of
+        ``QueueSimulator.simulate_metrics`` gathered from your own process pool.
+        
         Args:
             scenario: Original scenario configuration
-            results: List of individual simulation results
+            metrics: Kernel metrics of every run, shape (num_simulations, NUM_METRICS)
             
         Returns:
             Aggregated Monte Carlo results with confidence intervals
         """
-        if not results:
+        if len(metrics) == 0:
             raise ValueError("No simulation results to aggregate")
         
-        # Extract metrics from all runs
-        metrics = {
-            'avg_wait_time': [r.avg_wait_time for r in results],
-            'max_wait_time': [r.max_wait_time for r in results],
-            'p95_wait_time': [r.p95_wait_time for r in results],
-            'avg_queue_length': [r.avg_queue_length for r in results],
-            'desk_utilization': [r.desk_utilization for r in results],
-            'service_level_5min': [r.service_level_5min for r in results],
-            'total_customers': [r.total_customers for r in results]
-        }
-        
-        # Calculate means
-        means = {key: np.mean(values) for key, values in metrics.items()}
+        # Means and 95% confidence intervals of every metric column at once
+        num_simulations = len(metrics)
+        columns = metrics[:, list(AGGREGATED_METRICS.values())]
+        means = columns.mean(axis=0)
+        if num_simulations > 1:
+            std_err = columns.std(axis=0, ddof=1) / np.sqrt(num_simulations)
+            margin_error = _t_critical(num_simulations - 1, 0.95) * std_err
+        else:
+            # Single simulation - no confidence interval
+            margin_error = np.zeros_like(means)
         
-        # Calculate 95% confidence intervals
-        confidence_intervals = {}
-        for key, values in metrics.items():
-            if len(values) > 1:
-                ci = self._calculate_confidence_interval(values, confidence_level=0.95)
-                confidence_intervals[f"{key}_ci"] = ci
-            else:
-                # Single simulation - no confidence interval
-                confidence_intervals[f"{key}_ci"] = (means[key], means[key])
+        means = dict(zip(AGGREGATED_METRICS, means))
+        confidence_intervals = {
+            f"{key}_ci": (means[key] - margin, means[key] + margin)
+            for key, margin in zip(AGGREGATED_METRICS, margin_error)
+        }
         
         return MonteCarloResults(
             scenario_name=scenario.name,
-            num_simulations=len(results),
+            num_simulations=num_simulations,
             
             # Mean values
             avg_wait_time=means['avg_wait_time'],
@@ -151,34 +300,9 @@ class MonteCarloRunner:
             
             # Additional statistics
             total_customers_mean=means['total_customers'],
-            total_customers_std=np.std(metrics['total_customers'])
+            total_customers_std=metrics[:, _kernels.TOTAL_CUSTOMERS].std()
         )
     
-    def _calculate_confidence_interval(self, values: List[float], 
-                                     confidence_level: float = 0.95) -> Tuple[float, float]:
-        """Calculate confidence interval for a list of values.
-        
-        Args:
-            values: List of numeric values
-            confidence_level: Confidence level (e.g., 0.95 for 95%)
-            
-        Returns:
-            Tuple of (lower_bound, upper_bound)
-        """
-        values_array = np.array(values)
-        mean = np.mean(values_array)
-        std_err = np.std(values_array, ddof=1) / np.sqrt(len(values_array))
-        
-        # Use t-distribution for small samples
-        from scipy import stats
-        degrees_freedom = len(values_array) - 1
-        alpha = 1 - confidence_level
-        t_critical = stats.t.ppf(1 - alpha/2, degrees_freedom)
-        
-        margin_error = t_critical * std_err
-        
-        return (mean - margin_error, mean + margin_error)
-    
     def compare_scenarios(self, scenarios: List[ScenarioConfig]) -> Dict[str, MonteCarloResults]:
         """Run and compare multiple scenarios.
         
@@ -206,6 +330,13 @@ class MonteCarloRunner:
         Returns:
             Formatted text report
         """
+        # The analytical estimate has no maximum wait time
+        if np.isnan(results.max_wait_time):
+            max_wait = "n/a"
+        else:
+            max_wait = (f"{results.max_wait_time:.2f} minutes "
+                        f"({results.max_wait_time_ci[0]:.2f} - {results.max_wait_time_ci[1]:.2f})")
+        
         report = f"""
 Monte Carlo Simulation Report
 =============================
@@ -217,7 +348,7 @@ Key Metrics (95% Confidence Intervals):
 --------------------------------------
 Average Wait Time: {results.avg_wait_time:.2f} minutes ({results.avg_wait_time_ci[0]:.2f} - {results.avg_wait_time_ci[1]:.2f})
 95th Percentile Wait Time: {results.p95_wait_time:.2f} minutes ({results.p95_wait_time_ci[0]:.2f} - {results.p95_wait_time_ci[1]:.2f})
-Maximum Wait Time: {results.max_wait_time:.2f} minutes ({results.max_wait_time_ci[0]:.2f} - {results.max_wait_time_ci[1]:.2f})
+Maximum Wait Time: {max_wait}
 Average Queue Length: {results.avg_queue_length:.2f} customers ({results.avg_queue_length_ci[0]:.2f} - {results.avg_queue_length_ci[1]:.2f})
 Desk Utilization: {results.desk_utilization:.1%} ({results.desk_utilization_ci[0]:.1%} - {results.desk_utilization_ci[1]:.1%})
 Service Level (≤5 min): {results.service_level_5min:.1%} ({results.service_level_5min_ci[0]:.1%} - {results.service_level_5min_ci[1]:.1%})
@@ -2,23 +2,51 @@
 Multi-desk queue simulation engine.
 """
 import numpy as np
-from typing import List, Dict, Tuple
-from collections import deque
-from ..models import ScenarioConfig, Customer, Desk, SimulationResults
+from typing import Optional, Union
+from scipy.optimize import brentq
+from ..models import ScenarioConfig, SimulationResults
 from .arrival_generator import ArrivalGenerator
+from . import _kernels
+from ._kernels import NUM_METRICS, simulate_day
+
+
+def erlang_c(arrival_rate: float, service_rate: float, num_desks: int) -> Optional[float]:
+    """Probability that a customer has to wait in a steady-state M/M/c queue.
+    
+    Args:
+        arrival_rate: Customer arrival rate (customers per hour)
+        service_rate: Service rate of a single desk (customers per hour)
+        num_desks: Number of desks
+        
+    Returns:
+        Erlang-C waiting probability, or None if the queue is unstable
+        (utilization >= 1)
+    """
+    if arrival_rate <= 0:
+        return 0.0
+    
+    load = arrival_rate / service_rate
+    rho = load / num_desks
+    if rho >= 1:
+        return None
+    
+    # load**k / k! for k = 0..c, built as a running product to avoid large factorials
+    terms = np.cumprod(np.concatenate(([1.0], load / np.arange(1, num_desks + 1))))
+    tail = terms[num_desks] / (1 - rho)
+    return float(tail / (terms[:num_desks].sum() + tail))
 
 
 class QueueSimulator:
     """Simulates a multi-desk queue system with time-varying parameters."""
     
-    def __init__(self, random_seed: int = None):
+    def __init__(self, random_seed: Union[int, np.random.SeedSequence] = None):
         """Initialize the queue simulator.
         
         Args:
-            random_seed: Random seed for reproducibility
+            random_seed: Random seed (or SeedSequence) for reproducibility
         """
-        self.arrival_generator = ArrivalGenerator(random_seed)
-        self.rng = np.random.RandomState(random_seed)
+        self.rng = np.random.default_rng(random_seed)
+        self.arrival_generator = ArrivalGenerator(self.rng)
     
     def simulate(self, scenario: ScenarioConfig) -> SimulationResults:
         """Run a single simulation of the queue system.
@@ -29,189 +57,122 @@ class QueueSimulator:
         Returns:
             Simulation results
         """
-        # Generate customer arrivals
-        arrival_times = self.arrival_generator.generate_arrivals(scenario)
-        
-        if not arrival_times:
-            return self._empty_results(scenario)
+        return self.results_from_metrics(scenario, self.simulate_metrics(scenario))
+    
+    def simulate_metrics(self, scenario: ScenarioConfig,
+                         counts: Optional[np.ndarray] = None) -> np.ndarray:
+        """Run a single simulation and return the raw kernel metrics.
         
-        # Generate service times
+        Args:
+            scenario: Scenario configuration
+            counts: Customers per operating hour, drawn here if None
+            
+        Returns:
+            Array of NUM_METRICS simulation metrics
+        """
+        # Generate customer arrivals and service times
+        arrival_times = self.arrival_generator.generate_arrivals(scenario, counts)
         service_times = self.arrival_generator.generate_service_times(
             len(arrival_times), scenario.mean_service_time
         )
         
-        # Create customers
-        customers = [
-            Customer(i, arrival_time) 
-            for i, arrival_time in enumerate(arrival_times)
-        ]
-        
-        # Run simulation
-        return self._run_simulation(scenario, customers, service_times)
+        # Run simulation; a day without customers gives the empty-day metrics
+        return simulate_day(
+            arrival_times,
+            service_times,
+            scenario.get_hourly_desk_counts(),
+            self._total_minutes(scenario)
+        )
     
-    def _run_simulation(self, scenario: ScenarioConfig, 
-                       customers: List[Customer], 
-                       service_times: List[float]) -> SimulationResults:
-        """Run the actual queue simulation.
+    @classmethod
+    def simulate_analytic(cls, scenario: ScenarioConfig) -> Optional[np.ndarray]:
+        """Estimate the simulation metrics from the M/M/c (Erlang-C) formulas.
+        
+        Each operating hour is treated as a steady-state M/M/c queue with that
+        hour's arrival rate and desk count and exponential service times, and
+        the hourly results are weighted by arrival volume. The maximum wait and
+        queue length have no closed form and are NaN.
         
         Args:
             scenario: Scenario configuration
-            customers: List of customers with arrival times
-            service_times: List of service times for each customer
             
         Returns:
-            Simulation results
+            Array of NUM_METRICS estimated metrics, or None if demand reaches
+            capacity in some hour (the queue has no steady state)
         """
-        # Initialize desks - get maximum number needed
-        max_desks = self._get_max_desks(scenario)
-        desks = [Desk(i) for i in range(max_desks)]
-        
-        # Queue and tracking variables
-        queue = deque()
-        completed_customers = []
-        queue_length_history = []
-        current_time = 0.0
-        
-        # Process each customer arrival
-        for customer, service_time in zip(customers, service_times):
-            current_time = customer.arrival_time
-            
-            # Get available desks at current time
-            available_desks = self._get_available_desks(scenario, current_time)
-            active_desks = desks[:available_desks]
-            
-            # Check if any desk is available
-            available_desk = None
-            for desk in active_desks:
-                if desk.is_available(current_time):
-                    available_desk = desk
-                    break
-            
-            if available_desk:
-                # Serve customer immediately
-                available_desk.start_service(customer, current_time, service_time)
-                completed_customers.append(customer)
-            else:
-                # Add to queue
-                queue.append((customer, service_time))
-            
-            # Process queue - serve customers as desks become available
-            self._process_queue(queue, active_desks, completed_customers, current_time)
-            
-            # Record queue length
-            queue_length_history.append(len(queue))
-        
-        # Process remaining customers in queue
-        while queue:
-            # Find next available desk time
-            available_desks = self._get_available_desks(scenario, current_time)
-            active_desks = desks[:available_desks]
-            
-            next_available_time = min(desk.next_available_time for desk in active_desks)
-            current_time = max(current_time, next_available_time)
-            
-            self._process_queue(queue, active_desks, completed_customers, current_time)
-            queue_length_history.append(len(queue))
-        
-        # Calculate results
-        return self._calculate_results(scenario, completed_customers, desks, queue_length_history)
-    
-    def _get_max_desks(self, scenario: ScenarioConfig) -> int:
-        """Get the maximum number of desks needed throughout the day."""
-        if scenario.desk_schedule:
-            return max(scenario.desk_schedule.values())
-        return scenario.num_desks or 1
-    
-    def _get_available_desks(self, scenario: ScenarioConfig, current_time: float) -> int:
-        """Get number of available desks at current time."""
-        if scenario.desk_schedule:
-            # Convert time to hour
-            start_hour = scenario.operating_hours[0]
-            hour = int(current_time // 60) + start_hour
-            return scenario.desk_schedule.get(hour, 1)
-        return scenario.num_desks or 1
-    
-    def _process_queue(self, queue: deque, desks: List[Desk], 
-                      completed_customers: List[Customer], current_time: float):
-        """Process queue and assign customers to available desks."""
-        while queue:
-            # Find available desk
-            available_desk = None
-            for desk in desks:
-                if desk.is_available(current_time):
-                    available_desk = desk
-                    break
-            
-            if not available_desk:
-                break
-            
-            # Serve next customer in queue
-            customer, service_time = queue.popleft()
-            service_start_time = max(current_time, available_desk.next_available_time)
-            available_desk.start_service(customer, service_start_time, service_time)
-            completed_customers.append(customer)
-    
-    def _calculate_results(self, scenario: ScenarioConfig, 
-                          customers: List[Customer], 
-                          desks: List[Desk],
-                          queue_length_history: List[int]) -> SimulationResults:
-        """Calculate simulation results."""
-        if not customers:
-            return self._empty_results(scenario)
-        
-        # Calculate waiting times
-        wait_times = [c.wait_time for c in customers if c.wait_time is not None]
-        
-        if not wait_times:
-            return self._empty_results(scenario)
-        
-        avg_wait_time = np.mean(wait_times)
-        max_wait_time = np.max(wait_times)
-        p95_wait_time = np.percentile(wait_times, 95)
-        
-        # Calculate queue statistics
-        avg_queue_length = np.mean(queue_length_history) if queue_length_history else 0
-        max_queue_length = max(queue_length_history) if queue_length_history else 0
-        
-        # Calculate desk utilization
-        total_simulation_time = scenario.operating_hours[1] - scenario.operating_hours[0]
-        total_simulation_time_minutes = total_simulation_time * 60
-        
-        active_desks = [d for d in desks if d.customers_served > 0]
-        if active_desks:
-            desk_utilization = np.mean([d.get_utilization(total_simulation_time_minutes) 
-                                      for d in active_desks])
+        start_hour, end_hour = scenario.operating_hours
+        arrival_rates = np.array([scenario.arrival_rates.get(hour, 0.0)
+                                  for hour in range(start_hour, end_hour)])
+        desks_per_hour = scenario.get_hourly_desk_counts()
+        service_rate = 60 / scenario.mean_service_time
+        
+        total_arrivals = arrival_rates.sum()
+        if total_arrivals == 0:
+            return simulate_day(np.empty(0), np.empty(0), desks_per_hour,
+                                cls._total_minutes(scenario))
+        
+        prob_wait = np.empty(len(arrival_rates))
+        for hour, (arrival_rate, num_desks) in enumerate(zip(arrival_rates, desks_per_hour)):
+            prob = erlang_c(arrival_rate, service_rate, num_desks)
+            if prob is None:
+                return None
+            prob_wait[hour] = prob
+        
+        # A customer who has to wait does so for an exponential time with
+        # rate c*mu - lambda (per minute here)
+        decay = (desks_per_hour * service_rate - arrival_rates) / 60
+        weights = arrival_rates / total_arrivals
+        mean_wait = prob_wait / decay
+        
+        def prob_wait_longer(minutes: float) -> float:
+            return weights @ (prob_wait * np.exp(-decay * minutes))
+        
+        # 95th percentile of wait times over the day's mix of hours
+        if prob_wait_longer(0.0) <= 0.05:
+            p95_wait = 0.0
         else:
-            desk_utilization = 0.0
-        
-        # Calculate service level (% served within 5 minutes)
-        served_within_5min = sum(1 for wt in wait_times if wt <= 5.0)
-        service_level_5min = served_within_5min / len(wait_times)
-        
-        return SimulationResults(
-            scenario_name=scenario.name,
-            avg_wait_time=avg_wait_time,
-            max_wait_time=max_wait_time,
-            p95_wait_time=p95_wait_time,
-            avg_queue_length=avg_queue_length,
-            max_queue_length=max_queue_length,
-            desk_utilization=desk_utilization,
-            service_level_5min=service_level_5min,
-            total_customers=len(customers),
-            total_simulation_time=total_simulation_time_minutes
+            waiting = prob_wait > 0.05
+            upper = np.max(np.log(prob_wait[waiting] / 0.05) / decay[waiting])
+            p95_wait = brentq(lambda t: prob_wait_longer(t) - 0.05, 0.0, upper)
+        
+        metrics = np.full(NUM_METRICS, np.nan)
+        metrics[_kernels.AVG_WAIT] = weights @ mean_wait
+        metrics[_kernels.P95_WAIT] = p95_wait
+        # Queue seen by an arriving customer, counting them if they have to wait
+        metrics[_kernels.AVG_QUEUE_LENGTH] = weights @ (arrival_rates / 60 * mean_wait + prob_wait)
+        metrics[_kernels.DESK_UTILIZATION] = (
+            (arrival_rates / service_rate).sum() / (desks_per_hour.max() * len(desks_per_hour))
         )
+        metrics[_kernels.SERVICE_LEVEL_5MIN] = 1 - prob_wait_longer(5.0)
+        metrics[_kernels.TOTAL_CUSTOMERS] = total_arrivals
+        return metrics
     
-    def _empty_results(self, scenario: ScenarioConfig) -> SimulationResults:
-        """Return empty results for scenarios with no customers."""
+    @classmethod
+    def results_from_metrics(cls, scenario: ScenarioConfig, 
+                             metrics: np.ndarray) -> SimulationResults:
+        """Build simulation results from a row of kernel metrics.
+        
+        Args:
+            scenario: Scenario configuration
+            metrics: Metrics array as returned by the simulation kernels
+            
+        Returns:
+            Simulation results
+        """
         return SimulationResults(
             scenario_name=scenario.name,
-            avg_wait_time=0.0,
-            max_wait_time=0.0,
-            p95_wait_time=0.0,
-            avg_queue_length=0.0,
-            max_queue_length=0,
-            desk_utilization=0.0,
-            service_level_5min=1.0,
-            total_customers=0,
-            total_simulation_time=(scenario.operating_hours[1] - scenario.operating_hours[0]) * 60
+            avg_wait_time=float(metrics[_kernels.AVG_WAIT]),
+            max_wait_time=float(metrics[_kernels.MAX_WAIT]),
+            p95_wait_time=float(metrics[_kernels.P95_WAIT]),
+            avg_queue_length=float(metrics[_kernels.AVG_QUEUE_LENGTH]),
+            max_queue_length=int(metrics[_kernels.MAX_QUEUE_LENGTH]),
+            desk_utilization=float(metrics[_kernels.DESK_UTILIZATION]),
+            service_level_5min=float(metrics[_kernels.SERVICE_LEVEL_5MIN]),
+            total_customers=int(metrics[_kernels.TOTAL_CUSTOMERS]),
+            total_simulation_time=cls._total_minutes(scenario)
         )
+    
+    @staticmethod
+    def _total_minutes(scenario: ScenarioConfig) -> float:
+        """Get the length of the operating day in minutes."""
+        return float((scenario.operating_hours[1] - scenario.operating_hours[0]) * 60)
@@ -0,0 +1,41 @@
+"""
+Unit tests for the web app helpers.
+"""
+import pytest
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.main import _ResultsCache
+
+
+class TestResultsCache:
+    """Test the results cache of the web app."""
+    
+    def test_evicts_oldest_entry(self):
+        """Test that the oldest entry is dropped once the cache is full."""
+        cache = _ResultsCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.put("c", 3)
+        
+        assert len(cache) == 2
+        assert cache.get("a") is None
+        assert cache.get("b") == 2 and cache.get("c") == 3
+    
+    def test_get_marks_entry_recently_used(self):
+        """Test that reading an entry protects it from the next eviction."""
+        cache = _ResultsCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
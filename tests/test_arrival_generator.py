@@ -4,6 +4,7 @@ Unit tests for the arrival generator.
 import pytest
 import sys
 import os
+import numpy as np
 
 # Add the src directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
@@ -42,7 +43,7 @@ class TestArrivalGenerator:
         assert all(0 <= arrival < 120 for arrival in arrivals)
         
         # Arrivals should be sorted
-        assert arrivals == sorted(arrivals)
+        assert np.all(np.diff(arrivals) >= 0)
     
     def test_generate_arrivals_empty(self):
         """Test generating arrivals when rates are zero."""
@@ -60,6 +61,80 @@ class TestArrivalGenerator:
         arrivals = generator.generate_arrivals(scenario)
         assert len(arrivals) == 0
     
+    def test_generate_arrivals_batch(self):
+        """Test generating the arrivals of many days at once."""
+        generator = ArrivalGenerator(random_seed=42)
+        
+        scenario = ScenarioConfig(
+            name="Batch Test",
+            arrival_rates={9: 10, 10: 30},
+            num_desks=3,
+            mean_service_time=8.5,
+            operating_hours=(9, 12),  # No arrivals in the last hour
+            num_simulations=1
+        )
+        
+        offsets, times = generator.generate_arrivals_batch(scenario, 200)
+        
+        assert len(offsets) == 201
+        assert offsets[0] == 0 and offsets[-1] == len(times)
+        
+        # Each day is sorted and within the hours that have customers
+        for i in range(200):
+            day = times[offsets[i]:offsets[i + 1]]
+            assert np.all(np.diff(day) >= 0)
+            assert np.all((day >= 0) & (day < 120))
+        
+        # About 40 customers per day on average
+        assert 37 < len(times) / 200 < 43
+    
+    def test_generate_arrivals_batch_qmc(self):
+        """Test drawing the hourly counts from a Sobol sequence."""
+        generator = ArrivalGenerator(random_seed=42)
+        
+        scenario = ScenarioConfig(
+            name="QMC Test",
+            arrival_rates={9: 10, 10: 30},
+            num_desks=3,
+            mean_service_time=8.5,
+            operating_hours=(9, 12),
+            num_simulations=1,
+            qmc=True
+        )
+        
+        offsets, times = generator.generate_arrivals_batch(scenario, 256)
+        
+        assert len(offsets) == 257 and offsets[-1] == len(times)
+        for i in range(256):
+            day = times[offsets[i]:offsets[i + 1]]
+            assert np.all(np.diff(day) >= 0)
+            assert np.all((day >= 0) & (day < 120))
+        
+        # Evenly spread points keep the mean much closer to 40 than random draws
+        assert 39.5 < len(times) / 256 < 40.5
+    
+    def test_generate_arrivals_from_counts(self):
+        """Test placing given hourly counts within their hours."""
+        generator = ArrivalGenerator(random_seed=42)
+        
+        scenario = ScenarioConfig(
+            name="Counts Test",
+            arrival_rates={9: 10, 10: 30},
+            num_desks=3,
+            mean_service_time=8.5,
+            operating_hours=(9, 11),
+            num_simulations=1,
+            qmc=True
+        )
+        
+        counts = generator.generate_hourly_counts(scenario, 8)
+        assert counts.shape == (8, 2)
+        
+        arrivals = generator.generate_arrivals(scenario, counts[3])
+        assert np.all(np.diff(arrivals) >= 0)
+        assert np.sum(arrivals < 60) == counts[3, 0]
+        assert len(arrivals) == counts[3].sum()
+    
     def test_generate_service_times(self):
         """Test generating service times."""
         generator = ArrivalGenerator(random_seed=42)
@@ -73,6 +148,17 @@ class TestArrivalGenerator:
         mean_service = sum(service_times) / len(service_times)
         assert 7.0 < mean_service < 10.0  # Allow some variance
     
+    def test_spawn_seeds_gives_independent_streams(self):
+        """Test that spawned seeds are reproducible and give distinct streams."""
+        seeds = ArrivalGenerator.spawn_seeds(42, 3)
+        assert len(seeds) == 3
+        
+        draws = [ArrivalGenerator(seed).generate_service_times(5, 3.0) for seed in seeds]
+        assert not np.allclose(draws[0], draws[1]) and not np.allclose(draws[1], draws[2])
+        
+        again = ArrivalGenerator(ArrivalGenerator.spawn_seeds(42, 3)[0]).generate_service_times(5, 3.0)
+        np.testing.assert_array_equal(again, draws[0])
+    
     def test_validate_arrival_pattern(self):
         """Test arrival pattern validation and analysis."""
         generator = ArrivalGenerator()
@@ -0,0 +1,106 @@
+"""
+Unit tests for the simulation kernels.
+"""
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add the src directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.simulation import _kernels
+from src.simulation._kernels import fifo_schedule, simulate_day, simulate_replications
+
+
+class TestSimulateDay:
+    """Test the single-day scheduling kernel."""
+    
+    def test_single_desk_fifo(self):
+        """Test that customers queue behind a single busy desk."""
+        arrivals = np.array([0.0, 1.0, 2.0])
+        services = np.array([5.0, 5.0, 5.0])
+        desks = np.array([1], dtype=np.int64)
+        
+        metrics = simulate_day(arrivals, services, desks, 60.0)
+        
+        # Waits are 0, 4 and 8 minutes
+        assert metrics[_kernels.AVG_WAIT] == pytest.approx(4.0)
+        assert metrics[_kernels.MAX_WAIT] == pytest.approx(8.0)
+        assert metrics[_kernels.SERVICE_LEVEL_5MIN] == pytest.approx(2 / 3)
+        assert metrics[_kernels.MAX_QUEUE_LENGTH] == 2
+        assert metrics[_kernels.DESK_UTILIZATION] == pytest.approx(15.0 / 60.0)
+        assert metrics[_kernels.TOTAL_CUSTOMERS] == 3
+    
+    def test_extra_desk_removes_waiting(self):
+        """Test that enough desks serve everyone on arrival."""
+        arrivals = np.array([0.0, 1.0, 2.0])
+        services = np.array([5.0, 5.0, 5.0])
+        desks = np.array([3], dtype=np.int64)
+        
+        metrics = simulate_day(arrivals, services, desks, 60.0)
+        
+        assert metrics[_kernels.MAX_WAIT] == 0.0
+        assert metrics[_kernels.AVG_QUEUE_LENGTH] == 0.0
+        assert metrics[_kernels.SERVICE_LEVEL_5MIN] == 1.0
+    
+    def test_desk_schedule_by_hour(self):
+        """Test that only the desks open at arrival time are used."""
+        arrivals = np.array([0.0, 1.0, 60.0, 61.0])
+        services = np.array([10.0, 10.0, 10.0, 10.0])
+        desks = np.array([1, 2], dtype=np.int64)
+        
+        metrics = simulate_day(arrivals, services, desks, 120.0)
+        
+        # Second customer waits 9 minutes in hour one, nobody waits in hour two
+        assert metrics[_kernels.MAX_WAIT] == pytest.approx(9.0)
+        assert metrics[_kernels.AVG_WAIT] == pytest.approx(9.0 / 4)
+    
+    def test_no_customers(self):
+        """Test metrics for an empty day."""
+        metrics = simulate_day(np.empty(0), np.empty(0), np.array([2], dtype=np.int64), 60.0)
+        
+        assert metrics[_kernels.TOTAL_CUSTOMERS] == 0
+        assert metrics[_kernels.SERVICE_LEVEL_5MIN] == 1.0
+
+
+class TestSimulateReplications:
+    """Test the batched replication kernel."""
+    
+    def test_matches_single_day(self):
+        """Test that each replication equals a standalone simulate_day call."""
+        rng = np.random.default_rng(0)
+        counts = [30, 0, 45]
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        arrivals = np.concatenate([np.sort(rng.uniform(0, 120, n)) for n in counts])
+        services = rng.exponential(3.0, offsets[-1])
+        desks = np.array([2, 3], dtype=np.int64)
+        
+        results = simulate_replications(arrivals, services, offsets, desks, 120.0)
+        
+        assert results.shape == (3, _kernels.NUM_METRICS)
+        for i in range(3):
+            start, end = offsets[i], offsets[i + 1]
+            expected = simulate_day(arrivals[start:end], services[start:end], desks, 120.0)
+            np.testing.assert_allclose(results[i], expected)
+
+
+class TestFifoSchedule:
+    """Test the fixed-pool FIFO scheduling kernel."""
+    
+    def test_assigns_earliest_free_desk(self):
+        """Test waits, desk assignment and busy counts for two desks."""
+        arrivals = np.array([0.0, 1.0, 2.0, 3.0])
+        services = np.array([5.0, 5.0, 5.0, 5.0])
+        desk_free_at = np.zeros(2)
+        
+        wait_times, assigned_desks, busy_desks = fifo_schedule(arrivals, services, desk_free_at)
+        
+        np.testing.assert_allclose(wait_times, [0.0, 0.0, 3.0, 3.0])
+        np.testing.assert_array_equal(assigned_desks, [0, 1, 0, 1])
+        np.testing.assert_array_equal(busy_desks, [1, 2, 2, 2])
+        np.testing.assert_allclose(desk_free_at, [10.0, 11.0])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
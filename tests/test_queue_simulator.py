@@ -0,0 +1,92 @@
+"""
+Unit tests for the queue simulator.
+"""
+import pytest
+import sys
+import os
+import numpy as np
+
+# Add the src directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.models import ScenarioConfig, SimulationResults
+from src.simulation import _kernels
+from src.simulation.queue_simulator import QueueSimulator, erlang_c
+
+
+class TestErlangC:
+    """Test the Erlang-C waiting probability."""
+    
+    def test_single_desk_equals_utilization(self):
+        """Test that an M/M/1 customer waits with probability rho."""
+        assert erlang_c(30.0, 60.0, 1) == pytest.approx(0.5)
+    
+    def test_two_desks(self):
+        """Test a known M/M/2 value: load 1 gives C = 1/3."""
+        assert erlang_c(60.0, 60.0, 2) == pytest.approx(1 / 3)
+    
+    def test_unstable_queue(self):
+        """Test that no steady state is reported at full utilization."""
+        assert erlang_c(120.0, 60.0, 2) is None
+
+
+class TestSimulate:
+    """Test a single simulated day."""
+    
+    def test_results_model(self):
+        """Test that simulate returns a validated, serializable results model."""
+        scenario = ScenarioConfig(
+            name="Single Day",
+            arrival_rates={9: 20.0, 10: 30.0},
+            num_desks=2,
+            mean_service_time=3.0,
+            operating_hours=(9, 11)
+        )
+        
+        results = QueueSimulator(random_seed=42).simulate(scenario)
+        data = results.model_dump()
+        
+        assert data["scenario_name"] == "Single Day"
+        assert data["total_simulation_time"] == 120.0
+        assert 0 < data["total_customers"]
+        assert SimulationResults.model_validate(data) == results
+
+
+class TestSimulateAnalytic:
+    """Test the analytical M/M/c estimate."""
+    
+    def test_mm1_closed_form(self):
+        """Test the M/M/1 mean and tail of the wait time."""
+        scenario = ScenarioConfig(
+            name="M/M/1",
+            arrival_rates={9: 30.0},
+            num_desks=1,
+            mean_service_time=1.0,
+            operating_hours=(9, 10)
+        )
+        
+        metrics = QueueSimulator.simulate_analytic(scenario)
+        
+        # rho = 0.5 and waiting customers wait Exp(rate 0.5 per minute)
+        assert metrics[_kernels.AVG_WAIT] == pytest.approx(1.0)
+        assert metrics[_kernels.P95_WAIT] == pytest.approx(2 * np.log(10))
+        assert metrics[_kernels.SERVICE_LEVEL_5MIN] == pytest.approx(1 - 0.5 * np.exp(-2.5))
+        assert metrics[_kernels.DESK_UTILIZATION] == pytest.approx(0.5)
+        assert metrics[_kernels.TOTAL_CUSTOMERS] == 30
+        assert np.isnan(metrics[_kernels.MAX_WAIT])
+    
+    def test_overloaded_hour(self):
+        """Test that no estimate is given when an hour is over capacity."""
+        scenario = ScenarioConfig(
+            name="Overloaded",
+            arrival_rates={9: 30.0, 10: 90.0},
+            num_desks=1,
+            mean_service_time=1.0,
+            operating_hours=(9, 11)
+        )
+        
+        assert QueueSimulator.simulate_analytic(scenario) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])